@@ -20,18 +20,69 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Import utility functions
-from utils import get_db_connection
+from utils import db_connection
 
-def calculate_account_balances(conn) -> int:
+def refresh_balance_type_summary(conn, batch_id: str) -> int:
+    """
+    Refresh silver.account_balances_by_type_summary for the account types
+    touched by a batch. The caller is responsible for committing.
+    
+    Args:
+        conn: Database connection
+        batch_id: Batch ID written to silver.account_balances by this run
+        
+    Returns:
+        Number of account types refreshed
+    """
+    cursor = conn.cursor()
+    try:
+        # Only the account types with balances written by this batch need to be
+        # re-aggregated; the rest of the summary is reused as is
+        cursor.execute("""
+            WITH touched_types AS (
+                SELECT DISTINCT a.account_type
+                FROM silver.account_balances ab
+                JOIN silver.accounts a ON ab.account_id = a.account_id
+                WHERE ab.dwh_batch_id = %s
+            )
+            INSERT INTO silver.account_balances_by_type_summary (
+                account_type, account_count, balance_records, total_balance,
+                dwh_updated_at, dwh_batch_id
+            )
+            SELECT 
+                a.account_type,
+                COUNT(DISTINCT ab.account_id) as account_count,
+                COUNT(*) as balance_records,
+                SUM(ab.end_balance) as total_balance,
+                CURRENT_TIMESTAMP,
+                %s
+            FROM silver.account_balances ab
+            JOIN silver.accounts a ON ab.account_id = a.account_id
+            WHERE a.account_type IN (SELECT account_type FROM touched_types)
+            GROUP BY a.account_type
+            ON CONFLICT (account_type) DO UPDATE SET
+                account_count = EXCLUDED.account_count,
+                balance_records = EXCLUDED.balance_records,
+                total_balance = EXCLUDED.total_balance,
+                dwh_updated_at = EXCLUDED.dwh_updated_at,
+                dwh_batch_id = EXCLUDED.dwh_batch_id
+        """, (batch_id, batch_id))
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+def calculate_account_balances(conn, full_refresh: bool = False) -> int:
     """
     Calculate and load account balances for all accounts and fiscal periods.
-    This function performs the following steps:
+    This function performs the following steps in a single statement:
     1. Calculates period movements (debits/credits) based on journal lines
     2. Calculates starting and ending balances for each period
     3. Stores the results in silver.account_balances
     
     Args:
         conn: Database connection
+        full_refresh: If True, run inside the caller's transaction and leave
+            the commit to the caller
         
     Returns:
         Number of balance records processed
@@ -39,18 +90,26 @@ def calculate_account_balances(conn) -> int:
     try:
         cursor = conn.cursor()
         
+        if full_refresh:
+            # The full refresh can be regenerated from the source data, so we
+            # don't need to wait for the WAL flush on commit
+            cursor.execute("SET LOCAL synchronous_commit = OFF")
+        
         # Generate a batch ID for tracking
         batch_id = datetime.now().strftime("%Y%m%d%H%M%S")
         
         logger.info("Starting account balances calculation")
         
-        # Step 1: Calculate period movements (debits/credits) for each account and period
+        # Calculate period movements (debits/credits) for each account and period,
+        # together with the running balance in chronological order, and upsert
+        # them in a single statement
         # We combine journal entries with journal lines to get the right period for each transaction
-        logger.info("Calculating period movements from journal entries and lines")
+        logger.info("Calculating period movements and balances from journal entries and lines")
         
-        movements_query = """
+        balances_query = """
         WITH account_movements AS (
             -- Calcular débitos y créditos por cuenta y período
+            -- (debit_amount y credit_amount son NOT NULL, las sumas nunca son NULL)
             SELECT 
                 jl.account_id,
                 jl.account_number,
@@ -67,128 +126,90 @@ def calculate_account_balances(conn) -> int:
             SELECT 
                 a.account_id,
                 a.account_number,
-                fp.period_id
+                fp.period_id,
+                fp.start_date
             FROM silver.accounts a
             CROSS JOIN silver.fiscal_periods fp
             -- Solo incluimos períodos hasta el actual
             WHERE fp.end_date <= CURRENT_DATE
+        ),
+        period_balances AS (
+            -- Movimientos del período y saldo acumulado en orden cronológico
+            SELECT 
+                pwa.account_id,
+                pwa.account_number,
+                pwa.period_id,
+                COALESCE(am.total_debit, 0) as period_debit,
+                COALESCE(am.total_credit, 0) as period_credit,
+                SUM(COALESCE(am.total_debit, 0) - COALESCE(am.total_credit, 0)) OVER (
+                    PARTITION BY pwa.account_id
+                    ORDER BY pwa.start_date
+                ) as end_balance
+            FROM periods_with_accounts pwa
+            LEFT JOIN account_movements am 
+                ON pwa.account_id = am.account_id 
+                AND pwa.period_id = am.period_id
+            -- Solo incluir combinaciones donde hay movimientos o la cuenta es relevante
+            WHERE am.account_id IS NOT NULL
+                OR EXISTS (
+                    SELECT 1 FROM silver.journal_lines jl
+                    WHERE jl.account_id = pwa.account_id
+                )
         )
-        -- Insert/update account balances with period movements
+        -- Insert/update account balances with period movements and balances
         INSERT INTO silver.account_balances (
             account_id, account_number, period_id,
             start_balance, period_debit, period_credit, end_balance,
             is_calculated, dwh_created_at, dwh_updated_at, dwh_batch_id
         )
         SELECT 
-            pwa.account_id,
-            pwa.account_number,
-            pwa.period_id,
-            0 as start_balance, -- Inicialmente 0, se actualizará luego
-            COALESCE(am.total_debit, 0) as period_debit,
-            COALESCE(am.total_credit, 0) as period_credit,
-            0 as end_balance, -- Inicialmente 0, se actualizará luego
+            pb.account_id,
+            pb.account_number,
+            pb.period_id,
+            pb.end_balance - (pb.period_debit - pb.period_credit) as start_balance,
+            pb.period_debit,
+            pb.period_credit,
+            pb.end_balance,
             TRUE as is_calculated,
             CURRENT_TIMESTAMP as dwh_created_at,
             CURRENT_TIMESTAMP as dwh_updated_at,
             %s as dwh_batch_id
-        FROM periods_with_accounts pwa
-        LEFT JOIN account_movements am 
-            ON pwa.account_id = am.account_id 
-            AND pwa.period_id = am.period_id
-        -- Solo incluir combinaciones donde hay movimientos o la cuenta es relevante
-        WHERE am.total_debit IS NOT NULL 
-            OR am.total_credit IS NOT NULL
-            OR EXISTS (
-                SELECT 1 FROM silver.journal_lines jl
-                WHERE jl.account_id = pwa.account_id
-            )
+        FROM period_balances pb
         ON CONFLICT (account_id, period_id) DO UPDATE SET
+            start_balance = EXCLUDED.start_balance,
             period_debit = EXCLUDED.period_debit,
             period_credit = EXCLUDED.period_credit,
+            end_balance = EXCLUDED.end_balance,
             is_calculated = TRUE,
             dwh_updated_at = CURRENT_TIMESTAMP,
             dwh_batch_id = EXCLUDED.dwh_batch_id
-        RETURNING account_id, period_id
         """
         
-        cursor.execute(movements_query, (batch_id,))
-        movements_result = cursor.fetchall()
-        logger.info(f"Updated period movements for {len(movements_result)} account-period combinations")
-        
-        # Step 2: Update starting and ending balances
-        # This needs to be done in chronological order to ensure correct balance carry-forward
-        logger.info("Updating starting and ending balances in chronological order")
+        cursor.execute(balances_query, (batch_id,))
+        balances_updated = cursor.rowcount
         
-        update_balances_query = """
-        WITH ordered_periods AS (
-            -- Get periods in chronological order
-            SELECT period_id, start_date
-            FROM silver.fiscal_periods
-            ORDER BY start_date
-        ),
-        period_pairs AS (
-            -- Create pairs of current and previous periods
-            SELECT 
-                op.period_id as current_period_id,
-                LAG(op.period_id) OVER(ORDER BY op.start_date) as prev_period_id
-            FROM ordered_periods op
-        )
-        UPDATE silver.account_balances ab
-        SET 
-            -- Start balance is the end balance of the previous period, or 0 if first period
-            start_balance = CASE 
-                WHEN pp.prev_period_id IS NULL THEN 0
-                ELSE (
-                    SELECT prev.end_balance
-                    FROM silver.account_balances prev
-                    WHERE prev.account_id = ab.account_id
-                    AND prev.period_id = pp.prev_period_id
-                )
-            END,
-            -- End balance is start balance plus period movements
-            end_balance = CASE 
-                WHEN pp.prev_period_id IS NULL THEN ab.period_debit - ab.period_credit
-                ELSE (
-                    SELECT prev.end_balance
-                    FROM silver.account_balances prev
-                    WHERE prev.account_id = ab.account_id
-                    AND prev.period_id = pp.prev_period_id
-                ) + ab.period_debit - ab.period_credit
-            END
-        FROM period_pairs pp
-        WHERE ab.period_id = pp.current_period_id
-        """
+        logger.info(f"Updated period movements and balances for {balances_updated} account-period combinations")
         
-        cursor.execute(update_balances_query)
-        balances_updated = cursor.rowcount
-        conn.commit()
+        # Refresh the per-type summary for the account types touched by this batch
+        types_refreshed = refresh_balance_type_summary(conn, batch_id)
+        if not full_refresh:
+            conn.commit()
         
-        logger.info(f"Updated starting and ending balances for {balances_updated} records")
+        logger.info(f"Refreshed balance summary for {types_refreshed} account types")
         
-        # Step 3: Get statistics on the balances
+        # Get statistics on the balances
         cursor.execute("SELECT COUNT(*) FROM silver.account_balances")
         total_balances = cursor.fetchone()[0]
         
-        # Get statistics by account type
-        cursor.execute("""
-            SELECT 
-                a.account_type,
-                COUNT(DISTINCT ab.account_id) as account_count,
-                COUNT(*) as balance_records,
-                SUM(ab.end_balance) as total_balance
-            FROM silver.account_balances ab
-            JOIN silver.accounts a ON ab.account_id = a.account_id
-            GROUP BY a.account_type
-            ORDER BY a.account_type
-        """)
-        
-        type_stats = cursor.fetchall()
-        logger.info("Account balances by account type:")
-        for account_type, account_count, balance_records, total_balance in type_stats:
-            logger.info(f"  {account_type}: {account_count} accounts, {balance_records} records, {total_balance:.2f} total balance")
+        # Get statistics by account type from the summary table
+        type_stats = pd.read_sql("""
+            SELECT account_type, account_count, balance_records, total_balance
+            FROM silver.account_balances_by_type_summary
+            ORDER BY account_type
+        """, conn)
         
         # Get statistics by period
-        cursor.execute("""
+        period_stats = pd.read_sql("""
             SELECT 
                 fp.period_name,
                 COUNT(*) as balance_count,
@@ -201,12 +222,12 @@ def calculate_account_balances(conn) -> int:
             GROUP BY fp.period_id, fp.period_name
             ORDER BY fp.period_id DESC
             LIMIT 5
-        """)
+        """, conn)
         
-        period_stats = cursor.fetchall()
-        logger.info("Recent periods balance summary:")
-        for period_name, balance_count, assets, liabilities, equity in period_stats:
-            logger.info(f"  {period_name}: {balance_count} balances, Assets: {assets:.2f}, Liabilities: {liabilities:.2f}, Equity: {equity:.2f}")
+        # Emit each summary as a single formatted report
+        float_format = '{:.2f}'.format
+        logger.info(f"Account balances by account type:\n{type_stats.to_string(index=False, float_format=float_format)}")
+        logger.info(f"Recent periods balance summary:\n{period_stats.to_string(index=False, float_format=float_format)}")
         
         cursor.close()
         return total_balances
@@ -279,101 +300,42 @@ def recalculate_specific_period(conn, period_id: int) -> int:
         movements_updated = len(movements_result)
         logger.info(f"Updated period movements for {movements_updated} accounts in period {period_id}")
         
-        # Step 2: Update balances for this period and all future periods
-        # First, get the start date of this period to identify future periods
-        cursor.execute("SELECT start_date FROM silver.fiscal_periods WHERE period_id = %s", (period_id,))
-        period_start_date = cursor.fetchone()[0]
-        
-        # Now update this period and all future periods
+        # Step 2: Update balances for this period and all future periods with the
+        # same running sum as calculate_account_balances. The window reads the
+        # movements as updated in step 1 (same transaction), so every later
+        # period picks up the change, not just the next one
         update_balances_query = """
-        WITH RECURSIVE period_chain AS (
-            -- Start with the specified period
+        WITH running_balances AS (
+            -- Saldo acumulado por cuenta en orden cronológico
             SELECT 
-                fp.period_id,
+                ab.account_id,
+                ab.period_id,
                 fp.start_date,
-                fp.period_name,
-                1 as level
-            FROM silver.fiscal_periods fp
-            WHERE fp.period_id = %s
-            
-            UNION ALL
-            
-            -- Add all subsequent periods
-            SELECT 
-                fp.period_id,
-                fp.start_date,
-                fp.period_name,
-                pc.level + 1
-            FROM silver.fiscal_periods fp
-            JOIN period_chain pc ON fp.start_date > pc.start_date
-            ORDER BY fp.start_date
-        ),
-        period_sequence AS (
-            -- Create a sequence of periods in chronological order
-            SELECT 
-                period_id,
-                start_date,
-                period_name,
-                level,
-                LAG(period_id) OVER (ORDER BY start_date) as prev_period_id
-            FROM period_chain
+                ab.period_debit - ab.period_credit as movement,
+                SUM(ab.period_debit - ab.period_credit) OVER (
+                    PARTITION BY ab.account_id
+                    ORDER BY fp.start_date
+                ) as end_balance
+            FROM silver.account_balances ab
+            JOIN silver.fiscal_periods fp ON ab.period_id = fp.period_id
         )
-        -- Update balances for each period in the sequence
         UPDATE silver.account_balances ab
         SET 
-            -- Start balance is the end balance of the previous period, or 0 if first period
-            start_balance = CASE 
-                WHEN ps.prev_period_id IS NULL AND ps.level = 1 THEN (
-                    -- For the first period in our sequence, get start balance from the previous period if it exists
-                    SELECT prev.end_balance
-                    FROM silver.account_balances prev
-                    JOIN silver.fiscal_periods fp_prev ON prev.period_id = fp_prev.period_id
-                    WHERE prev.account_id = ab.account_id
-                    AND fp_prev.start_date = (
-                        SELECT MAX(start_date) 
-                        FROM silver.fiscal_periods 
-                        WHERE start_date < (SELECT start_date FROM silver.fiscal_periods WHERE period_id = %s)
-                    )
-                )
-                WHEN ps.prev_period_id IS NULL THEN 0
-                ELSE (
-                    -- For subsequent periods, use the end balance of the previous period
-                    SELECT prev.end_balance
-                    FROM silver.account_balances prev
-                    WHERE prev.account_id = ab.account_id
-                    AND prev.period_id = ps.prev_period_id
-                )
-            END,
-            -- End balance is start balance plus period movements
-            end_balance = CASE 
-                WHEN ps.prev_period_id IS NULL AND ps.level = 1 THEN (
-                    -- First period: Previous end balance + current movements
-                    SELECT COALESCE(prev.end_balance, 0)
-                    FROM silver.account_balances prev
-                    JOIN silver.fiscal_periods fp_prev ON prev.period_id = fp_prev.period_id
-                    WHERE prev.account_id = ab.account_id
-                    AND fp_prev.start_date = (
-                        SELECT MAX(start_date) 
-                        FROM silver.fiscal_periods 
-                        WHERE start_date < (SELECT start_date FROM silver.fiscal_periods WHERE period_id = %s)
-                    )
-                ) + ab.period_debit - ab.period_credit
-                WHEN ps.prev_period_id IS NULL THEN ab.period_debit - ab.period_credit
-                ELSE (
-                    -- Subsequent periods: Previous end balance + current movements
-                    SELECT prev.end_balance
-                    FROM silver.account_balances prev
-                    WHERE prev.account_id = ab.account_id
-                    AND prev.period_id = ps.prev_period_id
-                ) + ab.period_debit - ab.period_credit
-            END,
-            dwh_updated_at = CURRENT_TIMESTAMP
-        FROM period_sequence ps
-        WHERE ab.period_id = ps.period_id
+            start_balance = rb.end_balance - rb.movement,
+            end_balance = rb.end_balance,
+            dwh_updated_at = CURRENT_TIMESTAMP,
+            dwh_batch_id = %s
+        FROM running_balances rb
+        WHERE ab.account_id = rb.account_id
+          AND ab.period_id = rb.period_id
+          AND rb.start_date >= (
+              SELECT start_date FROM silver.fiscal_periods WHERE period_id = %s
+          )
         """
         
-        cursor.execute(update_balances_query, (period_id, period_id, period_id))
+        cursor.execute(update_balances_query, (batch_id, period_id))
         balances_updated = cursor.rowcount
+        refresh_balance_type_summary(conn, batch_id)
         conn.commit()
         
         logger.info(f"Updated balances for {balances_updated} records across {period_id} and subsequent periods")
@@ -403,36 +365,33 @@ def load_account_balances_main(full_refresh: bool = False, period_id: Optional[i
     logger.info(f"Starting account balances ETL process at {start_time}")
     
     try:
-        # Get database connection
-        conn = get_db_connection()
-        
-        # Determine process type
-        if full_refresh:
-            logger.info("Performing full refresh of all account balances")
-            # Truncate the table first if full refresh
-            cursor = conn.cursor()
-            cursor.execute("TRUNCATE TABLE silver.account_balances")
-            conn.commit()
-            cursor.close()
+        # Borrow a connection from the pool, returned when the block exits
+        with db_connection() as conn:
+            # Determine process type
+            if full_refresh:
+                logger.info("Performing full refresh of all account balances")
+                # Truncate the table first if full refresh. The truncate and the
+                # recalculation run in a single transaction, committed at the end
+                cursor = conn.cursor()
+                cursor.execute("TRUNCATE TABLE silver.account_balances, silver.account_balances_by_type_summary")
+                cursor.close()
+                
+                # Calculate all balances
+                total_balances = calculate_account_balances(conn, full_refresh=True)
+                conn.commit()
+                logger.info(f"Full refresh completed. {total_balances} account balance records created.")
             
-            # Calculate all balances
-            total_balances = calculate_account_balances(conn)
-            logger.info(f"Full refresh completed. {total_balances} account balance records created.")
-        
-        elif period_id is not None:
-            logger.info(f"Recalculating account balances for period {period_id} and subsequent periods")
-            # Recalculate balances for the specified period and all future periods
-            updated_count = recalculate_specific_period(conn, period_id)
-            logger.info(f"Period-specific recalculation completed. {updated_count} records updated.")
-        
-        else:
-            logger.info("Performing standard account balances update")
-            # Standard process: add any missing periods and update existing ones
-            total_balances = calculate_account_balances(conn)
-            logger.info(f"Standard balance calculation completed. {total_balances} total account balance records.")
-        
-        # Close connection
-        conn.close()
+            elif period_id is not None:
+                logger.info(f"Recalculating account balances for period {period_id} and subsequent periods")
+                # Recalculate balances for the specified period and all future periods
+                updated_count = recalculate_specific_period(conn, period_id)
+                logger.info(f"Period-specific recalculation completed. {updated_count} records updated.")
+            
+            else:
+                logger.info("Performing standard account balances update")
+                # Standard process: add any missing periods and update existing ones
+                total_balances = calculate_account_balances(conn)
+                logger.info(f"Standard balance calculation completed. {total_balances} total account balance records.")
         
         # Log completion
         end_time = datetime.now()
@@ -443,8 +402,6 @@ def load_account_balances_main(full_refresh: bool = False, period_id: Optional[i
         
     except Exception as e:
         logger.error(f"Account balances ETL failed: {str(e)}")
-        if 'conn' in locals() and not conn.closed:
-            conn.close()
         return False
 
 if __name__ == "__main__":
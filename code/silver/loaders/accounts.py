@@ -8,9 +8,14 @@ y los carga en la tabla silver.accounts para su uso en reporting financiero.
 
 import os
 import logging
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from psycopg2.extras import execute_values
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 
 # Configuración de logging
 logging.basicConfig(
@@ -20,10 +25,13 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Importar utilidades compartidas
-from utils import get_db_connection
+from utils import (
+    db_connection, copy_query_to_dataframe, copy_rows_to_table,
+    drop_secondary_indexes, recreate_indexes, iter_in_background
+)
 
 # Mapeos del PGC para el Balance
-BALANCE_SECTION_MAPPING = {
+BALANCE_SECTION_MAPPING = MappingProxyType({
     # Activo No Corriente
     '20': {'section': 'ACTIVO', 'subsection': 'ACTIVO NO CORRIENTE', 'group': 'Inmovilizado intangible', 'order': 10},
     '21': {'section': 'ACTIVO', 'subsection': 'ACTIVO NO CORRIENTE', 'group': 'Inmovilizado material', 'order': 20},
@@ -59,7 +67,9 @@ BALANCE_SECTION_MAPPING = {
     '5580': {'section': 'ACTIVO', 'subsection': 'ACTIVO CORRIENTE', 'group': 'Inversiones en empresas del grupo y asociadas a corto plazo', 'order': 120},
     
     '54': {'section': 'ACTIVO', 'subsection': 'ACTIVO CORRIENTE', 'group': 'Inversiones financieras a corto plazo', 'order': 130},
-    '55': {'section': 'ACTIVO', 'subsection': 'ACTIVO CORRIENTE', 'group': 'Inversiones financieras a corto plazo', 'order': 130},
+    # El subgrupo 55 es Pasivo corriente por defecto; los derivados de activo (5590, 5593) van aquí
+    '5590': {'section': 'ACTIVO', 'subsection': 'ACTIVO CORRIENTE', 'group': 'Inversiones financieras a corto plazo', 'order': 130},
+    '5593': {'section': 'ACTIVO', 'subsection': 'ACTIVO CORRIENTE', 'group': 'Inversiones financieras a corto plazo', 'order': 130},
     
     '480': {'section': 'ACTIVO', 'subsection': 'ACTIVO CORRIENTE', 'group': 'Periodificaciones a corto plazo', 'order': 140},
     '567': {'section': 'ACTIVO', 'subsection': 'ACTIVO CORRIENTE', 'group': 'Periodificaciones a corto plazo', 'order': 140},
@@ -96,10 +106,10 @@ BALANCE_SECTION_MAPPING = {
     '477': {'section': 'PATRIMONIO NETO Y PASIVO', 'subsection': 'PASIVO CORRIENTE', 'group': 'Acreedores comerciales y otras cuentas a pagar', 'order': 420},
     '485': {'section': 'PATRIMONIO NETO Y PASIVO', 'subsection': 'PASIVO CORRIENTE', 'group': 'Periodificaciones a corto plazo', 'order': 430},
     '568': {'section': 'PATRIMONIO NETO Y PASIVO', 'subsection': 'PASIVO CORRIENTE', 'group': 'Periodificaciones a corto plazo', 'order': 430},
-}
+})
 
 # Mapeos del PGC para la Cuenta de PyG
-PYG_SECTION_MAPPING = {
+PYG_SECTION_MAPPING = MappingProxyType({
     # Ingresos de Explotación
     '70': {'section': 'RESULTADO DE EXPLOTACIÓN', 'group': 'Importe neto de la cifra de negocios', 'order': 10},
     '71': {'section': 'RESULTADO DE EXPLOTACIÓN', 'group': 'Variación de existencias', 'order': 20},
@@ -126,38 +136,278 @@ PYG_SECTION_MAPPING = {
     # Impuestos
     '630': {'section': 'IMPUESTOS', 'group': 'Impuestos sobre beneficios', 'order': 200},
     '631': {'section': 'IMPUESTOS', 'group': 'Otros tributos', 'order': 210},
+})
+
+# Mapeo simple de grupos del PGC a tipos de cuenta (los grupos 1, 4 y 5
+# tienen reglas adicionales por subgrupo en determine_account_type)
+GROUP_TYPE_MAP = MappingProxyType({
+    2: "Asset",      # Grupo 2: Activo no corriente
+    3: "Asset",      # Grupo 3: Existencias
+    4: "Asset",      # Grupo 4: Acreedores y deudores (por defecto Asset)
+    6: "Expense",    # Grupo 6: Gastos
+    7: "Income",     # Grupo 7: Ingresos
+})
+
+# Mapeo de subgrupos del PGC a subtipos de cuenta
+SUBTYPE_MAP = MappingProxyType({
+    # Grupo 1: FINANCIACIÓN BÁSICA
+    10: "Capital",
+    11: "Reservas",
+    12: "Resultados pendientes de aplicación",
+    13: "Subvenciones y donaciones",
+    14: "Provisiones",
+    15: "Deudas a largo plazo con características especiales",
+    16: "Deudas a largo plazo con partes vinculadas",
+    17: "Deudas a largo plazo por préstamos",
+    18: "Pasivos por fianzas y garantías a largo plazo",
+    19: "Situaciones transitorias de financiación",
+    
+    # Grupo 2: ACTIVO NO CORRIENTE
+    20: "Inmovilizaciones intangibles",
+    21: "Inmovilizaciones materiales",
+    22: "Inversiones inmobiliarias",
+    23: "Inmovilizaciones materiales en curso",
+    24: "Inversiones financieras en partes vinculadas",
+    25: "Otras inversiones financieras a largo plazo",
+    26: "Fianzas y depósitos constituidos a largo plazo",
+    28: "Amortización acumulada del inmovilizado",
+    29: "Deterioro de valor de activos no corrientes",
+    
+    # Grupo 3: EXISTENCIAS
+    30: "Comerciales",
+    31: "Materias primas",
+    32: "Otros aprovisionamientos",
+    33: "Productos en curso",
+    34: "Productos semiterminados",
+    35: "Productos terminados",
+    36: "Subproductos y residuos",
+    39: "Deterioro de valor de existencias",
+    
+    # Grupo 4: ACREEDORES Y DEUDORES
+    40: "Proveedores",
+    41: "Acreedores varios",
+    43: "Clientes",
+    44: "Deudores varios",
+    46: "Personal",
+    47: "Administraciones públicas",
+    48: "Ajustes por periodificación",
+    49: "Deterioro de valor de créditos comerciales",
+    
+    # Grupo 5: CUENTAS FINANCIERAS
+    50: "Empréstitos y deudas a corto plazo",
+    51: "Deudas a corto plazo con partes vinculadas",
+    52: "Deudas a corto plazo por préstamos",
+    53: "Inversiones financieras a corto plazo en partes vinculadas",
+    54: "Otras inversiones financieras a corto plazo",
+    55: "Otras cuentas no bancarias",
+    56: "Fianzas y depósitos recibidos a corto plazo",
+    57: "Tesorería",
+    58: "Activos no corrientes mantenidos para la venta",
+    59: "Deterioro del valor de inversiones financieras a corto plazo",
+    
+    # Grupo 6: COMPRAS Y GASTOS
+    60: "Compras",
+    61: "Variación de existencias",
+    62: "Servicios exteriores",
+    63: "Tributos",
+    64: "Gastos de personal",
+    65: "Otros gastos de gestión",
+    66: "Gastos financieros",
+    67: "Pérdidas procedentes de activos no corrientes",
+    68: "Dotaciones para amortizaciones",
+    69: "Pérdidas por deterioro",
+    
+    # Grupo 7: VENTAS E INGRESOS
+    70: "Ventas de mercaderías y producción",
+    71: "Variación de existencias",
+    73: "Trabajos realizados para la empresa",
+    74: "Subvenciones a la explotación",
+    75: "Otros ingresos de gestión",
+    76: "Ingresos financieros",
+    77: "Beneficios procedentes de activos no corrientes",
+    79: "Excesos y aplicaciones de provisiones"
+})
+
+# Columnas de silver.accounts en el orden de las tuplas de transform_accounts_data
+# (dwh_created_at y dwh_updated_at toman el DEFAULT CURRENT_TIMESTAMP de la tabla)
+ACCOUNT_COLUMNS = (
+    'account_id', 'account_number', 'account_name', 'account_group',
+    'account_type', 'account_subtype', 'balance_section', 'balance_subsection',
+    'balance_group', 'balance_subgroup', 'pyg_section', 'pyg_group',
+    'pyg_subgroup', 'balance_order', 'pyg_order', 'is_analytic',
+    'parent_account_number', 'account_level', 'is_active', 'current_balance',
+    'debit_balance', 'credit_balance', 'last_movement_date', 'pgc_group',
+    'pgc_subgroup', 'pgc_detail', 'tax_relevant', 'dwh_source_table',
+    'dwh_batch_id',
+)
+
+# INSERT multi-fila para execute_values; en cargas incrementales las cuentas
+# existentes se actualizan con los valores nuevos
+INSERT_ACCOUNTS_SQL = f"INSERT INTO silver.accounts ({', '.join(ACCOUNT_COLUMNS)}) VALUES %s"
+ACCOUNTS_ON_CONFLICT_SQL = (
+    "ON CONFLICT (account_id) DO UPDATE SET "
+    + ", ".join(f"{column} = EXCLUDED.{column}" for column in ACCOUNT_COLUMNS[1:])
+    + ", dwh_updated_at = CURRENT_TIMESTAMP"
+)
+UPSERT_ACCOUNTS_SQL = f"{INSERT_ACCOUNTS_SQL} {ACCOUNTS_ON_CONFLICT_SQL}"
+
+# Tablas de consulta densas para la transformación vectorizada:
+# subtipo indexado por subgrupo (0-99) y tipo por defecto indexado por grupo (0-9).
+# Los grupos 1, 4 y 5 tienen excepciones por subgrupo que se aplican aparte.
+_SUBTYPE_ARR = np.array([f"Subgrupo {i}" for i in range(100)], dtype=object)
+for _subgroup, _subtype in SUBTYPE_MAP.items():
+    _SUBTYPE_ARR[_subgroup] = _subtype
+
+# Potencias de 10 (10^0 .. 10^18) para contar dígitos, rellenar a 8 dígitos
+# y extraer los primeros dígitos de un número de cuenta sin pasar por str
+_POW10 = 10 ** np.arange(19, dtype=np.int64)
+
+# Prefijos de cuentas relevantes para impuestos: IVA (472, 477), impuesto de
+# sociedades (473, 4740, 4745), ingresos (7) y gastos (6)
+_TAX_PREFIXES = ('472', '473', '477', '4740', '4745', '6', '7')
+
+# Tipos de cuenta codificados como int8 (índices en _TYPE_LABELS)
+_TYPE_LABELS = np.array(["Unknown", "Asset", "Liability", "Equity", "Income", "Expense"], dtype=object)
+_UNKNOWN, _ASSET, _LIABILITY, _EQUITY, _INCOME, _EXPENSE = range(len(_TYPE_LABELS))
+
+_TYPE_G_ARR = np.array(
+    [_UNKNOWN, _LIABILITY, _ASSET, _ASSET, _ASSET, _ASSET, _EXPENSE, _INCOME, _UNKNOWN, _UNKNOWN],
+    dtype=np.int8
+)
+
+# Subgrupos de los grupos 4 (40, 41, 47) y 5 (50, 51, 52, 56) que son pasivos,
+# como tabla booleana indexada por subgrupo
+_LIABILITY_SUBGROUPS = np.zeros(100, dtype=bool)
+_LIABILITY_SUBGROUPS[[40, 41, 47, 50, 51, 52, 56]] = True
+
+# Longitudes de los códigos de cada mapeo, de mayor a menor, para buscar el prefijo más largo
+_BALANCE_PREFIX_LENGTHS = tuple(sorted({len(code) for code in BALANCE_SECTION_MAPPING}, reverse=True))
+_PYG_PREFIX_LENGTHS = tuple(sorted({len(code) for code in PYG_SECTION_MAPPING}, reverse=True))
+
+def _build_section_lookup(mapping, columns: Tuple[str, ...]) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """
+    Prepara un mapeo de Balance o PyG para la búsqueda vectorizada.
+    
+    Args:
+        mapping: BALANCE_SECTION_MAPPING o PYG_SECTION_MAPPING
+        columns: Columnas del mapeo a devolver
+        
+    Returns:
+        Tupla con (por longitud de código: códigos enteros ordenados y su posición)
+        y las columnas del mapeo como arrays por posición; la última posición
+        es el mapeo vacío (None y order 999)
+    """
+    codes = list(mapping)
+    payload = {
+        column: np.array([mapping[code].get(column) for code in codes] + [999 if column == 'order' else None],
+                         dtype=object)
+        for column in columns
+    }
+    
+    by_length = {}
+    for length in sorted({len(code) for code in codes}):
+        entries = sorted((int(code), position) for position, code in enumerate(codes) if len(code) == length)
+        by_length[length] = (
+            np.array([code for code, _ in entries], dtype=np.int64),
+            np.array([position for _, position in entries], dtype=np.int64),
+        )
+    
+    return by_length, payload
+
+# Mapeos de Balance y PyG como códigos enteros ordenados para la transformación vectorizada
+_BALANCE_LOOKUP = _build_section_lookup(BALANCE_SECTION_MAPPING, ('section', 'subsection', 'group', 'subgroup', 'order'))
+_PYG_LOOKUP = _build_section_lookup(PYG_SECTION_MAPPING, ('section', 'group', 'subgroup', 'order'))
+
+# Consulta de extracción de bronze.holded_accounts y tipos de sus columnas en el CSV de COPY
+BRONZE_ACCOUNTS_QUERY = """
+SELECT 
+    id, 
+    num, 
+    name, 
+    "group", 
+    debit, 
+    credit, 
+    balance,
+    dwh_update_timestamp
+FROM bronze.holded_accounts
+{where}
+ORDER BY num
+"""
+
+# Solo se extraen las columnas que usa transform_accounts_data
+_BRONZE_ACCOUNTS_DTYPES = {
+    'id': 'object', 'num': 'Int64', 'name': 'object', 'group': 'object',
+    'debit': 'float64', 'credit': 'float64', 'balance': 'float64'
 }
+_BRONZE_ACCOUNTS_TEXT_COLUMNS = ['name', 'group']
+
+def _clean_bronze_accounts(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normaliza un DataFrame leído del CSV de COPY: pandas lee los NULL (\\N)
+    como NaN, así que las columnas de texto usan None como haría read_sql.
+    """
+    text_columns = _BRONZE_ACCOUNTS_TEXT_COLUMNS
+    df[text_columns] = df[text_columns].astype(object).where(df[text_columns].notna(), None)
+    return df
+
+# Margen que se resta a la marca de agua de las cargas incrementales. La marca
+# sale de dwh_updated_at de silver (reloj de la base de datos), pero bronze se
+# sella con datetime.now() del cliente, con otro reloj y quizá otra zona
+# horaria, y una fila sellada antes de la carga puede confirmarse después de
+# que la extracción tome su instantánea. Volver a procesar un día de cambios es
+# inofensivo porque la carga incremental hace upsert.
+WATERMARK_OVERLAP = timedelta(days=1)
+
+def _bronze_accounts_query(since: Optional[datetime]) -> Tuple[str, Optional[tuple]]:
+    """
+    Construye la consulta de extracción, limitada a las cuentas actualizadas
+    en bronze después de since si se indica.
+    """
+    if since is None:
+        return BRONZE_ACCOUNTS_QUERY.format(where=""), None
+    return BRONZE_ACCOUNTS_QUERY.format(where="WHERE dwh_update_timestamp > %s"), (since,)
+
+def get_accounts_watermark(conn) -> Optional[datetime]:
+    """
+    Obtiene la fecha a partir de la cual una carga incremental necesita las
+    cuentas modificadas en bronze: la última carga en silver.accounts menos
+    WATERMARK_OVERLAP, para cubrir las diferencias de reloj entre bronze y
+    silver y las filas confirmadas en bronze durante la carga anterior.
+    
+    Args:
+        conn: Conexión a la base de datos
+        
+    Returns:
+        Marca de agua, o None si la tabla está vacía
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT max(dwh_updated_at) FROM silver.accounts")
+        last_load = cursor.fetchone()[0]
+        return last_load - WATERMARK_OVERLAP if last_load is not None else None
+    finally:
+        cursor.close()
 
-def extract_bronze_accounts(conn) -> pd.DataFrame:
+def extract_bronze_accounts(conn, since: Optional[datetime] = None) -> pd.DataFrame:
     """
     Extrae los datos de cuentas de bronze.holded_accounts.
     
     Args:
         conn: Conexión a la base de datos
+        since: Si se indica, extraer solo las cuentas actualizadas después de esta fecha
         
     Returns:
         DataFrame con los datos de las cuentas
     """
     try:
-        query = """
-        SELECT 
-            id, 
-            color, 
-            num, 
-            name, 
-            "group", 
-            debit, 
-            credit, 
-            balance,
-            dwh_insert_timestamp,
-            dwh_update_timestamp,
-            dwh_batch_id
-        FROM bronze.holded_accounts
-        ORDER BY num
-        """
-        
         logger.info("Extrayendo datos de cuentas desde bronze.holded_accounts")
-        df = pd.read_sql(query, conn)
+        query, params = _bronze_accounts_query(since)
+        df = copy_query_to_dataframe(
+            conn, query, params,
+            dtype=_BRONZE_ACCOUNTS_DTYPES,
+            parse_dates=['dwh_update_timestamp']
+        )
+        df = _clean_bronze_accounts(df)
         
         logger.info(f"Extraídas {len(df)} cuentas de la capa bronze")
         return df
@@ -166,6 +416,39 @@ def extract_bronze_accounts(conn) -> pd.DataFrame:
         logger.error(f"Error al extraer cuentas de bronze: {str(e)}")
         raise
 
+def iter_bronze_accounts(conn, chunksize: int = 50000,
+                         since: Optional[datetime] = None) -> Iterator[pd.DataFrame]:
+    """
+    Extrae los datos de cuentas de bronze.holded_accounts en bloques.
+    
+    El resultado completo de COPY se guarda primero en memoria como CSV; luego
+    se parsea por bloques de chunksize filas, de modo que solo existe a la vez
+    el DataFrame (y las tuplas transformadas) de un bloque, junto a ese CSV.
+    
+    Args:
+        conn: Conexión a la base de datos
+        chunksize: Número de filas por bloque
+        since: Si se indica, extraer solo las cuentas actualizadas después de esta fecha
+        
+    Returns:
+        Iterador de DataFrames con los datos de las cuentas
+    """
+    logger.info(f"Extrayendo datos de cuentas desde bronze.holded_accounts en bloques de {chunksize}")
+    query, params = _bronze_accounts_query(since)
+    reader = copy_query_to_dataframe(
+        conn, query, params,
+        dtype=_BRONZE_ACCOUNTS_DTYPES,
+        parse_dates=['dwh_update_timestamp'],
+        chunksize=chunksize
+    )
+    
+    extracted = 0
+    for df_chunk in reader:
+        extracted += len(df_chunk)
+        yield _clean_bronze_accounts(df_chunk)
+    
+    logger.info(f"Extraídas {extracted} cuentas de la capa bronze")
+
 def determine_account_type(account_number: int) -> str:
     """
     Determina el tipo de cuenta según el Plan General Contable español.
@@ -179,15 +462,6 @@ def determine_account_type(account_number: int) -> str:
     # Extraer primer dígito (grupo principal)
     first_digit = account_number // 10000000
     
-    # Mapeo simple de grupos
-    group_type_map = {
-        2: "Asset",      # Grupo 2: Activo no corriente
-        3: "Asset",      # Grupo 3: Existencias
-        4: "Asset",      # Grupo 4: Acreedores y deudores (por defecto Asset)
-        6: "Expense",    # Grupo 6: Gastos
-        7: "Income",     # Grupo 7: Ingresos
-    }
-    
     # Para los grupos que necesitan análisis adicional
     if first_digit == 1:  # Grupo 1: FINANCIACIÓN BÁSICA
         # Subgrupos 10-13 son Patrimonio Neto
@@ -214,7 +488,31 @@ def determine_account_type(account_number: int) -> str:
             return "Asset"
             
     # Usar el mapeo simple para el resto
-    return group_type_map.get(first_digit, "Unknown")
+    return GROUP_TYPE_MAP.get(first_digit, "Unknown")
+
+def classify_account_types(account_numbers: np.ndarray) -> np.ndarray:
+    """
+    Clasifica un array de números de cuenta con las mismas reglas que
+    determine_account_type, devolviendo códigos int8.
+    
+    Args:
+        account_numbers: Array int64 de números de cuenta de 8 dígitos
+        
+    Returns:
+        Array int8 de índices en _TYPE_LABELS
+    """
+    groups = account_numbers // 10000000
+    subgroups = account_numbers // 1000000
+    
+    # Tipo por defecto del grupo (la indexación devuelve una copia)
+    codes = _TYPE_G_ARR[np.clip(groups, 0, len(_TYPE_G_ARR) - 1)]
+    
+    # Excepciones por subgrupo
+    codes[(groups == 1) & (subgroups <= 13)] = _EQUITY
+    in_table = (subgroups >= 0) & (subgroups < len(_LIABILITY_SUBGROUPS))
+    codes[in_table & _LIABILITY_SUBGROUPS[np.clip(subgroups, 0, len(_LIABILITY_SUBGROUPS) - 1)]] = _LIABILITY
+    
+    return codes
 
 def determine_account_subtype(account_number: int) -> str:
     """
@@ -229,87 +527,7 @@ def determine_account_subtype(account_number: int) -> str:
     # Extraer dos primeros dígitos (subgrupo)
     subgroup = account_number // 1000000
     
-    # Mapeo de subgrupos a subtipos
-    subtype_map = {
-        # Grupo 1: FINANCIACIÓN BÁSICA
-        10: "Capital",
-        11: "Reservas",
-        12: "Resultados pendientes de aplicación",
-        13: "Subvenciones y donaciones",
-        14: "Provisiones",
-        15: "Deudas a largo plazo con características especiales",
-        16: "Deudas a largo plazo con partes vinculadas",
-        17: "Deudas a largo plazo por préstamos",
-        18: "Pasivos por fianzas y garantías a largo plazo",
-        19: "Situaciones transitorias de financiación",
-        
-        # Grupo 2: ACTIVO NO CORRIENTE
-        20: "Inmovilizaciones intangibles",
-        21: "Inmovilizaciones materiales",
-        22: "Inversiones inmobiliarias",
-        23: "Inmovilizaciones materiales en curso",
-        24: "Inversiones financieras en partes vinculadas",
-        25: "Otras inversiones financieras a largo plazo",
-        26: "Fianzas y depósitos constituidos a largo plazo",
-        28: "Amortización acumulada del inmovilizado",
-        29: "Deterioro de valor de activos no corrientes",
-        
-        # Grupo 3: EXISTENCIAS
-        30: "Comerciales",
-        31: "Materias primas",
-        32: "Otros aprovisionamientos",
-        33: "Productos en curso",
-        34: "Productos semiterminados",
-        35: "Productos terminados",
-        36: "Subproductos y residuos",
-        39: "Deterioro de valor de existencias",
-        
-        # Grupo 4: ACREEDORES Y DEUDORES
-        40: "Proveedores",
-        41: "Acreedores varios",
-        43: "Clientes",
-        44: "Deudores varios",
-        46: "Personal",
-        47: "Administraciones públicas",
-        48: "Ajustes por periodificación",
-        49: "Deterioro de valor de créditos comerciales",
-        
-        # Grupo 5: CUENTAS FINANCIERAS
-        50: "Empréstitos y deudas a corto plazo",
-        51: "Deudas a corto plazo con partes vinculadas",
-        52: "Deudas a corto plazo por préstamos",
-        53: "Inversiones financieras a corto plazo en partes vinculadas",
-        54: "Otras inversiones financieras a corto plazo",
-        55: "Otras cuentas no bancarias",
-        56: "Fianzas y depósitos recibidos a corto plazo",
-        57: "Tesorería",
-        58: "Activos no corrientes mantenidos para la venta",
-        59: "Deterioro del valor de inversiones financieras a corto plazo",
-        
-        # Grupo 6: COMPRAS Y GASTOS
-        60: "Compras",
-        61: "Variación de existencias",
-        62: "Servicios exteriores",
-        63: "Tributos",
-        64: "Gastos de personal",
-        65: "Otros gastos de gestión",
-        66: "Gastos financieros",
-        67: "Pérdidas procedentes de activos no corrientes",
-        68: "Dotaciones para amortizaciones",
-        69: "Pérdidas por deterioro",
-        
-        # Grupo 7: VENTAS E INGRESOS
-        70: "Ventas de mercaderías y producción",
-        71: "Variación de existencias",
-        73: "Trabajos realizados para la empresa",
-        74: "Subvenciones a la explotación",
-        75: "Otros ingresos de gestión",
-        76: "Ingresos financieros",
-        77: "Beneficios procedentes de activos no corrientes",
-        79: "Excesos y aplicaciones de provisiones"
-    }
-    
-    return subtype_map.get(subgroup, f"Subgrupo {subgroup}")
+    return SUBTYPE_MAP.get(subgroup, f"Subgrupo {subgroup}")
 
 def get_balance_mapping(account_number: int) -> Dict:
     """
@@ -323,18 +541,11 @@ def get_balance_mapping(account_number: int) -> Dict:
     """
     account_str = str(account_number)
     
-    # Probar coincidencias exactas primero
-    if account_str in BALANCE_SECTION_MAPPING:
-        return BALANCE_SECTION_MAPPING[account_str]
-    
-    # Luego probar por los primeros dígitos
-    first_two = account_str[:2]
-    if first_two in BALANCE_SECTION_MAPPING:
-        return BALANCE_SECTION_MAPPING[first_two]
-    
-    first_one = account_str[:1]
-    if first_one in BALANCE_SECTION_MAPPING:
-        return BALANCE_SECTION_MAPPING[first_one]
+    # Coincidencia por el prefijo más largo (una consulta por longitud de código)
+    for length in _BALANCE_PREFIX_LENGTHS:
+        mapping = BALANCE_SECTION_MAPPING.get(account_str[:length])
+        if mapping is not None:
+            return mapping
     
     # Si no hay coincidencia, devolver un mapeo vacío
     return {
@@ -366,18 +577,11 @@ def get_pyg_mapping(account_number: int) -> Dict:
             'order': 999
         }
     
-    # Probar coincidencias exactas primero
-    if account_str in PYG_SECTION_MAPPING:
-        return PYG_SECTION_MAPPING[account_str]
-    
-    # Luego probar por los primeros dígitos
-    first_two = account_str[:2]
-    if first_two in PYG_SECTION_MAPPING:
-        return PYG_SECTION_MAPPING[first_two]
-    
-    first_one = account_str[:1]
-    if first_one in PYG_SECTION_MAPPING:
-        return PYG_SECTION_MAPPING[first_one]
+    # Coincidencia por el prefijo más largo (una consulta por longitud de código)
+    for length in _PYG_PREFIX_LENGTHS:
+        mapping = PYG_SECTION_MAPPING.get(account_str[:length])
+        if mapping is not None:
+            return mapping
     
     # Si no hay coincidencia, devolver un mapeo vacío
     return {
@@ -387,6 +591,55 @@ def get_pyg_mapping(account_number: int) -> Dict:
         'order': 999
     }
 
+def leading_digits(nums: np.ndarray, digits: np.ndarray, k: int) -> np.ndarray:
+    """
+    Obtiene los k primeros dígitos de cada número de cuenta como entero.
+    
+    Args:
+        nums: Array int64 de números de cuenta
+        digits: Número de dígitos de cada cuenta
+        k: Número de dígitos a conservar
+        
+    Returns:
+        Array int64 con los k primeros dígitos (el número completo si tiene menos)
+    """
+    return nums // _POW10[np.clip(digits - k, 0, len(_POW10) - 1)]
+
+def map_sections(nums: np.ndarray, digits: np.ndarray, lookup: Tuple[Dict, Dict[str, np.ndarray]],
+                 applies: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Versión vectorizada de get_balance_mapping / get_pyg_mapping.
+    
+    Busca para cada cuenta, con np.searchsorted sobre los códigos ordenados
+    de cada longitud, el código del mapeo que sea su prefijo más largo y toma
+    todas las columnas de esa entrada.
+    
+    Args:
+        nums: Array int64 de números de cuenta
+        digits: Número de dígitos de cada cuenta
+        lookup: Mapeo preparado (_BALANCE_LOOKUP o _PYG_LOOKUP)
+        applies: Máscara opcional de cuentas a las que se aplica el mapeo
+        
+    Returns:
+        Diccionario de columnas del mapeo alineadas con nums; None donde no
+        hay mapeo y order a 999
+    """
+    by_length, payload = lookup
+    no_mapping = len(next(iter(payload.values()))) - 1
+    rows = np.full(len(nums), no_mapping, dtype=np.int64)
+    
+    # De prefijos cortos a largos: cada coincidencia más larga sobrescribe a la anterior
+    for length, (codes, positions) in by_length.items():
+        prefix = leading_digits(nums, digits, length)
+        index = np.clip(np.searchsorted(codes, prefix), 0, len(codes) - 1)
+        hit = (codes[index] == prefix) & (digits >= length) & (nums > 0)
+        rows = np.where(hit, positions[index], rows)
+    
+    if applies is not None:
+        rows = np.where(applies, rows, no_mapping)
+    
+    return {column: values[rows] for column, values in payload.items()}
+
 def determine_parent_account(account_number: int) -> int:
     """
     Determina el número de cuenta padre para la jerarquía.
@@ -410,130 +663,206 @@ def is_tax_relevant(account_number: int) -> bool:
     Returns:
         True si la cuenta es relevante para impuestos, False en caso contrario
     """
-    account_str = str(account_number)
+    return str(account_number).startswith(_TAX_PREFIXES)
+
+def transform_accounts_data(df: pd.DataFrame, batch_id: Optional[str] = None) -> List[Tuple]:
+    """
+    Transforma y enriquece los datos de cuentas para la capa silver.
     
-    # Cuentas de IVA
-    if account_str.startswith('472') or account_str.startswith('477'):
-        return True
+    Todas las columnas derivadas se calculan como operaciones vectorizadas
+    sobre el DataFrame completo en lugar de fila a fila.
     
-    # Cuentas de impuesto de sociedades
-    if account_str.startswith('473') or account_str.startswith('4740') or account_str.startswith('4745'):
-        return True
+    Args:
+        df: DataFrame con datos de cuentas de bronze
+        batch_id: Identificador del lote (por defecto, la fecha y hora actuales)
+        
+    Returns:
+        Lista de tuplas con datos transformados listos para inserción
+    """
+    if df.empty:
+        return []
     
-    # Cuentas de ingresos (para declaraciones de IVA)
-    if account_str.startswith('7'):
-        return True
+    logger.info("Transformando datos de cuentas para silver.accounts")
     
-    # Cuentas de gastos (para declaraciones de IVA)
-    if account_str.startswith('6'):
-        return True
+    batch_id = batch_id or datetime.now().strftime("%Y%m%d%H%M%S")
+    
+    # Validar que el número de cuenta existe y es numérico
+    nums = pd.to_numeric(df['num'], errors='coerce')
+    valid = nums.notna()
+    skipped_accounts = int((~valid).sum())
+    if skipped_accounts:
+        skipped_ids = df.loc[~valid, 'id'].tolist()
+        logger.warning("%d cuentas sin número válido, omitiendo (primeros IDs: %s)",
+                       skipped_accounts, skipped_ids[:20])
+    
+    df = df[valid]
+    account_numbers = nums[valid].astype('int64')
+    
+    # Importes nulos a 0 en una sola pasada
+    amounts = df[['balance', 'debit', 'credit']].fillna(0).astype('float64')
+    
+    # Rellenar a 8 dígitos si es necesario
+    nums = account_numbers.to_numpy()
+    needs_padding = (nums > 0) & (nums < 10000000)
+    if needs_padding.any():
+        # Número de dígitos sin pasar por str: posición en la tabla de potencias de 10
+        digits = np.searchsorted(_POW10, nums, side='right')
+        digit_values, digit_counts = np.unique(digits[needs_padding], return_counts=True)
+        pad_counts = dict(zip(digit_values.tolist(), digit_counts.tolist()))
+        logger.info("%d cuentas tienen menos de 8 dígitos, rellenando (cuentas por número de dígitos: %s)",
+                    int(needs_padding.sum()), pad_counts)
+        padded = nums * _POW10[np.clip(8 - digits, 0, 8)]
+        account_numbers = pd.Series(np.where(needs_padding, padded, nums), index=account_numbers.index)
+    
+    # Obtener grupo, subgrupo y detalle PGC, y cuenta padre para jerarquía
+    pgc_group = account_numbers // 10000000
+    pgc_subgroup = account_numbers // 1000000
+    pgc_detail = account_numbers // 10000
+    parent_account = (account_numbers // 10) * 10
+    
+    # Determinar tipo de cuenta
+    account_type = _TYPE_LABELS[classify_account_types(account_numbers.to_numpy())]
+    
+    # Determinar subtipo de cuenta
+    subgroups = pgc_subgroup.to_numpy()
+    account_subtype = _SUBTYPE_ARR[np.clip(subgroups, 0, len(_SUBTYPE_ARR) - 1)]
+    out_of_range = (subgroups < 0) | (subgroups >= len(_SUBTYPE_ARR))
+    if out_of_range.any():
+        account_subtype[out_of_range] = [f"Subgrupo {sg}" for sg in subgroups[out_of_range].tolist()]
+    
+    # Determinar si la cuenta es relevante para impuestos (mismos prefijos que
+    # is_tax_relevant, comparando los primeros dígitos como enteros)
+    nums = account_numbers.to_numpy()
+    digits = np.searchsorted(_POW10, nums, side='right')
+    first_digit = leading_digits(nums, digits, 1)
+    tax_relevant = (nums > 0) & (
+        np.isin(first_digit, [6, 7])
+        | np.isin(leading_digits(nums, digits, 3), [472, 473, 477])
+        | np.isin(leading_digits(nums, digits, 4), [4740, 4745])
+    )
+    
+    # Calcular fecha del último movimiento
+    has_movement = (amounts['debit'] > 0) | (amounts['credit'] > 0)
+    update_timestamps = pd.to_datetime(df['dwh_update_timestamp'], errors='coerce')
+    last_movement = update_timestamps.dt.date.where(has_movement & update_timestamps.notna(), None)
     
-    return False
+    # Nombre y grupo por defecto para valores nulos o vacíos
+    has_name = df['name'].notna() & (df['name'] != '')
+    account_name = df['name'].where(has_name, "Cuenta " + account_numbers.astype(str))
+    has_group = df['group'].notna() & (df['group'] != '')
+    account_group = df['group'].where(has_group, "Sin Grupo")
+    
+    numbers = account_numbers.tolist()
+    
+    # Obtener mapeos de balance y PyG (PyG solo para los grupos 6 y 7)
+    balance = map_sections(nums, digits, _BALANCE_LOOKUP)
+    pyg = map_sections(nums, digits, _PYG_LOOKUP, applies=(nums > 0) & np.isin(first_digit, [6, 7]))
+    
+    n_rows = len(numbers)
+    transformed_data = list(zip(
+        df['id'].tolist(),                                               # account_id
+        numbers,                                                         # account_number
+        account_name.tolist(),                                           # account_name
+        account_group.tolist(),                                          # account_group
+        account_type.tolist(),                                           # account_type
+        account_subtype.tolist(),                                        # account_subtype
+        balance['section'].tolist(),                                     # balance_section
+        balance['subsection'].tolist(),                                  # balance_subsection
+        balance['group'].tolist(),                                       # balance_group
+        balance['subgroup'].tolist(),                                    # balance_subgroup
+        pyg['section'].tolist(),                                         # pyg_section
+        pyg['group'].tolist(),                                           # pyg_group
+        pyg['subgroup'].tolist(),                                        # pyg_subgroup
+        balance['order'].tolist(),                                       # balance_order
+        pyg['order'].tolist(),                                           # pyg_order
+        [True] * n_rows,                                                 # is_analytic (todas las cuentas de 8 dígitos son analíticas)
+        parent_account.tolist(),                                         # parent_account_number
+        [5] * n_rows,                                                    # account_level (nivel 5 para cuentas de 8 dígitos)
+        [True] * n_rows,                                                 # is_active
+        amounts['balance'].tolist(),                                     # current_balance
+        amounts['debit'].tolist(),                                       # debit_balance
+        amounts['credit'].tolist(),                                      # credit_balance
+        last_movement.tolist(),                                          # last_movement_date
+        pgc_group.tolist(),                                              # pgc_group
+        pgc_subgroup.tolist(),                                           # pgc_subgroup
+        pgc_detail.tolist(),                                             # pgc_detail
+        tax_relevant.tolist(),                                           # tax_relevant
+        ['bronze.holded_accounts'] * n_rows,                             # dwh_source_table
+        [batch_id] * n_rows                                              # dwh_batch_id
+    ))
+    
+    logger.info("Transformación completada. %d cuentas procesadas, %d omitidas",
+                len(transformed_data), skipped_accounts)
+    return transformed_data
 
-def transform_accounts_data(df: pd.DataFrame) -> List[Tuple]:
+def transform_account_chunks_parallel(df_chunks: Iterable[pd.DataFrame], batch_id: str,
+                                      workers: int) -> Iterator[List[Tuple]]:
     """
-    Transforma y enriquece los datos de cuentas para la capa silver.
+    Transforma bloques de cuentas en paralelo con un pool de procesos,
+    devolviendo los resultados en el orden de entrada.
+    
+    Como mucho hay workers + 1 bloques en vuelo, para no materializar toda
+    la extracción; la carga sigue en el proceso principal.
     
     Args:
-        df: DataFrame con datos de cuentas de bronze
+        df_chunks: Iterable de DataFrames con datos de cuentas de bronze
+        batch_id: Identificador del lote común a todos los bloques
+        workers: Número de procesos
         
     Returns:
-        Lista de tuplas con datos transformados listos para inserción
+        Iterador de listas de tuplas transformadas
     """
-    logger.info("Transformando datos de cuentas para silver.accounts")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for df_chunk in df_chunks:
+            pending.append(executor.submit(transform_accounts_data, df_chunk, batch_id))
+            if len(pending) > workers:
+                yield pending.popleft().result()
+        
+        while pending:
+            yield pending.popleft().result()
+
+def log_type_distribution(type_counts: Dict[str, int]) -> None:
+    """
+    Registra la distribución de cuentas por tipo.
     
-    batch_id = datetime.now().strftime("%Y%m%d%H%M%S")
-    transformed_data = []
-    skipped_accounts = 0
-    
-    for _, row in df.iterrows():
-        account_id = row['id']
-        
-        # Validar que el número de cuenta existe
-        if pd.isna(row['num']) or row['num'] is None:
-            logger.warning(f"Cuenta con ID {account_id} no tiene número, omitiendo")
-            skipped_accounts += 1
-            continue
-        
-        # Asegurar que el número de cuenta es un entero
-        try:
-            account_number = int(row['num'])
-        except (ValueError, TypeError):
-            logger.warning(f"Número de cuenta inválido para ID {account_id}: {row['num']}, omitiendo")
-            skipped_accounts += 1
-            continue
-        
-        # Rellenar a 8 dígitos si es necesario
-        if account_number < 10000000:
-            digits = len(str(account_number))
-            logger.info(f"Cuenta {account_number} tiene {digits} dígitos en lugar de 8, rellenando")
-            account_number = account_number * 10**(8 - digits)
-        
-        # Determinar tipo y subtipo de cuenta
-        account_type = determine_account_type(account_number)
-        account_subtype = determine_account_subtype(account_number)
-        
-        # Obtener mapeos de balance y PyG
-        balance_mapping = get_balance_mapping(account_number)
-        pyg_mapping = get_pyg_mapping(account_number)
-        
-        # Determinar cuenta padre para jerarquía
-        parent_account = determine_parent_account(account_number)
-        
-        # Obtener grupo y subgrupo PGC
-        pgc_group = account_number // 10000000
-        pgc_subgroup = account_number // 1000000
-        pgc_detail = account_number // 10000
-        
-        # Determinar si la cuenta es relevante para impuestos
-        tax_relevant = is_tax_relevant(account_number)
-        
-        # Calcular fecha del último movimiento
-        last_movement = None
-        if row['debit'] > 0 or row['credit'] > 0:
-            last_movement = row['dwh_update_timestamp'].date() if isinstance(row['dwh_update_timestamp'], datetime) else None
-        
-        # Crear tupla de datos para inserción
-        account_data = (
-            account_id,                          # account_id
-            account_number,                      # account_number
-            row['name'] or f"Cuenta {account_number}",  # account_name
-            row['group'] or "Sin Grupo",         # account_group
-            account_type,                        # account_type
-            account_subtype,                     # account_subtype
-            balance_mapping['section'],          # balance_section
-            balance_mapping['subsection'],       # balance_subsection
-            balance_mapping['group'],            # balance_group
-            balance_mapping.get('subgroup'),     # balance_subgroup
-            pyg_mapping['section'],              # pyg_section
-            pyg_mapping['group'],                # pyg_group
-            pyg_mapping.get('subgroup'),         # pyg_subgroup
-            balance_mapping['order'],            # balance_order
-            pyg_mapping['order'],                # pyg_order
-            True,                                # is_analytic (todas las cuentas de 8 dígitos son analíticas)
-            parent_account,                      # parent_account_number
-            5,                                   # account_level (nivel 5 para cuentas de 8 dígitos)
-            True,                                # is_active
-            row['balance'] or 0,                 # current_balance
-            row['debit'] or 0,                   # debit_balance
-            row['credit'] or 0,                  # credit_balance
-            last_movement,                       # last_movement_date
-            pgc_group,                           # pgc_group
-            pgc_subgroup,                        # pgc_subgroup
-            pgc_detail,                          # pgc_detail
-            tax_relevant,                        # tax_relevant
-            datetime.now(),                      # dwh_created_at
-            datetime.now(),                      # dwh_updated_at
-            'bronze.holded_accounts',            # dwh_source_table
-            batch_id                             # dwh_batch_id
-        )
+    Args:
+        type_counts: Número de cuentas por tipo de cuenta
+    """
+    logger.info("Distribución por tipo de cuenta:")
+    for account_type, type_count in Counter(type_counts).most_common():
+        logger.info(f"  {account_type}: {type_count} cuentas")
+
+def log_account_stats(cursor) -> int:
+    """
+    Registra el número de cuentas en silver.accounts y su distribución por
+    tipo consultando la tabla (verificación tras la carga).
+    
+    Args:
+        cursor: Cursor de base de datos
         
-        transformed_data.append(account_data)
+    Returns:
+        Número de registros en silver.accounts
+    """
+    # Obtener número de registros en la tabla
+    cursor.execute("SELECT COUNT(*) FROM silver.accounts")
+    count = cursor.fetchone()[0]
     
-    logger.info(f"Transformación completada. {len(transformed_data)} cuentas procesadas, {skipped_accounts} omitidas")
-    return transformed_data
+    logger.info(f"Verificación: {count} registros en silver.accounts")
+    
+    # Generar estadísticas de carga
+    cursor.execute("""
+        SELECT account_type, COUNT(*) 
+        FROM silver.accounts 
+        GROUP BY account_type 
+    """)
+    
+    log_type_distribution(dict(cursor.fetchall()))
+    
+    return count
 
-def load_accounts_to_silver(conn, accounts_data: List[Tuple], full_refresh: bool = False) -> int:
+def load_accounts_to_silver(conn, accounts_data: List[Tuple], full_refresh: bool = False,
+                            verify: bool = False) -> int:
     """
     Carga los datos transformados de cuentas en la tabla silver.accounts.
     
@@ -541,75 +870,272 @@ def load_accounts_to_silver(conn, accounts_data: List[Tuple], full_refresh: bool
         conn: Conexión a la base de datos
         accounts_data: Lista de tuplas con datos transformados
         full_refresh: Si es True, truncar la tabla destino antes de cargar
+        verify: Si es True, contar los registros consultando la tabla tras la carga
         
     Returns:
         Número de registros insertados
     """
-    if not accounts_data:
-        logger.warning("No hay datos para cargar en silver.accounts")
-        return 0
+    return load_account_chunks_to_silver(conn, [accounts_data], full_refresh, verify)
+
+def load_account_chunks_to_silver(conn, chunks: Iterable[List[Tuple]], full_refresh: bool = False,
+                                  verify: bool = False) -> int:
+    """
+    Carga bloques de cuentas transformadas en silver.accounts dentro de una
+    única transacción.
+    
+    Las estadísticas se calculan a partir de los datos cargados; con verify
+    se consultan además en la tabla.
     
+    Args:
+        conn: Conexión a la base de datos
+        chunks: Iterable de listas de tuplas con datos transformados
+        full_refresh: Si es True, truncar la tabla destino antes de cargar
+        verify: Si es True, contar los registros consultando la tabla tras la carga
+        
+    Returns:
+        Número de registros insertados
+    """
     try:
         cursor = conn.cursor()
         
-        # Si es full refresh, truncar la tabla destino
+        # En full refresh se carga primero una tabla temporal (sin WAL) y
+        # silver.accounts solo se bloquea para el TRUNCATE + INSERT final
+        if full_refresh:
+            cursor.execute("""
+                CREATE TEMP TABLE accounts_stage (LIKE silver.accounts INCLUDING DEFAULTS)
+                ON COMMIT DROP
+            """)
+        
+        loaded = 0
+        type_counts = Counter()
+        for accounts_data in chunks:
+            if not accounts_data:
+                continue
+            
+            if full_refresh:
+                # COPY FROM STDIN es la vía de carga más rápida
+                copy_rows_to_table(cursor, 'accounts_stage', ACCOUNT_COLUMNS, accounts_data)
+            else:
+                # Ejecutar upsert por lotes (un INSERT multi-fila por página)
+                execute_values(cursor, UPSERT_ACCOUNTS_SQL, accounts_data, page_size=1000)
+            
+            loaded += len(accounts_data)
+            type_counts.update(account[4] for account in accounts_data)  # account_type
+            logger.info(f"Cargadas {loaded} cuentas en silver.accounts")
+        
+        if loaded == 0:
+            # Sin datos: no tocar la tabla destino
+            logger.warning("No hay datos para cargar en silver.accounts")
+            conn.rollback()
+            cursor.close()
+            return 0
+        
         if full_refresh:
             logger.info("Truncando tabla silver.accounts para full refresh")
+            cursor.execute("SET LOCAL synchronous_commit = OFF")
             cursor.execute("TRUNCATE TABLE silver.accounts CASCADE")
+            
+            # Cargar sin índices secundarios y reconstruirlos después de una vez
+            index_defs = drop_secondary_indexes(cursor, 'silver.accounts')
+            cursor.execute("INSERT INTO silver.accounts SELECT * FROM accounts_stage")
+            recreate_indexes(cursor, index_defs)
+            cursor.execute("ANALYZE silver.accounts")
         
-        # Preparar consulta de inserción
-        insert_query = """
-        INSERT INTO silver.accounts (
-            account_id, account_number, account_name, account_group, 
-            account_type, account_subtype, balance_section, balance_subsection,
-            balance_group, balance_subgroup, pyg_section, pyg_group,
-            pyg_subgroup, balance_order, pyg_order, is_analytic,
-            parent_account_number, account_level, is_active, current_balance,
-            debit_balance, credit_balance, last_movement_date, pgc_group,
-            pgc_subgroup, pgc_detail, tax_relevant, dwh_created_at,
-            dwh_updated_at, dwh_source_table, dwh_batch_id
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        # Ejecutar inserción por lotes
-        cursor.executemany(insert_query, accounts_data)
         conn.commit()
         
-        # Obtener número de registros insertados
-        cursor.execute("SELECT COUNT(*) FROM silver.accounts")
-        count = cursor.fetchone()[0]
+        logger.info(f"Carga completada. {loaded} registros insertados en silver.accounts")
+        log_type_distribution(type_counts)
         
-        logger.info(f"Carga completada. {count} registros insertados en silver.accounts")
+        count = log_account_stats(cursor) if verify else loaded
         
-        # Generar estadísticas de carga
-        cursor.execute("""
-            SELECT account_type, COUNT(*) 
-            FROM silver.accounts 
-            GROUP BY account_type 
-            ORDER BY account_type
-        """)
+        cursor.close()
+        return count
         
-        type_stats = cursor.fetchall()
-        logger.info("Distribución por tipo de cuenta:")
-        for account_type, type_count in type_stats:
-            logger.info(f"  {account_type}: {type_count} cuentas")
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error al cargar datos en silver.accounts: {str(e)}")
+        if 'cursor' in locals():
+            cursor.close()
+        raise
+
+def _values_sql(cursor, rows: List[Tuple]) -> str:
+    """
+    Construye una lista VALUES literal a partir de tuplas de Python.
+    
+    Args:
+        cursor: Cursor de base de datos (para escapar los valores)
+        rows: Lista de tuplas con el mismo número de elementos
+        
+    Returns:
+        Texto SQL con las filas separadas por comas
+    """
+    placeholders = "(" + ", ".join(["%s"] * len(rows[0])) + ")"
+    # Escapar '%' para que el texto pueda incrustarse en una consulta con parámetros
+    return ",\n".join(cursor.mogrify(placeholders, row).decode().replace('%', '%%') for row in rows)
+
+def load_accounts_in_database(conn, full_refresh: bool = False, verify: bool = False,
+                              since: Optional[datetime] = None) -> int:
+    """
+    Carga silver.accounts directamente desde bronze.holded_accounts con un
+    único INSERT ... SELECT, sin pasar los datos por Python.
+    
+    Aplica las mismas reglas que transform_accounts_data; los mapeos del PGC
+    se envían como listas VALUES construidas desde los diccionarios del módulo.
+    
+    Args:
+        conn: Conexión a la base de datos
+        full_refresh: Si es True, truncar la tabla destino antes de cargar
+        verify: Si es True, registrar la distribución por tipo consultando la tabla
+        since: Si se indica, cargar solo las cuentas actualizadas en bronze después de esta fecha
+        
+    Returns:
+        Número de registros insertados
+    """
+    batch_id = datetime.now().strftime("%Y%m%d%H%M%S")
+    
+    try:
+        cursor = conn.cursor()
+        
+        subtype_values = _values_sql(cursor, list(SUBTYPE_MAP.items()))
+        balance_values = _values_sql(cursor, [
+            (prefix, m['section'], m['subsection'], m['group'], m.get('subgroup'), m['order'])
+            for prefix, m in BALANCE_SECTION_MAPPING.items()
+        ])
+        pyg_values = _values_sql(cursor, [
+            (prefix, m['section'], m['group'], m.get('subgroup'), m['order'])
+            for prefix, m in PYG_SECTION_MAPPING.items()
+        ])
+        
+        insert_query = f"""
+        WITH subtype_map (subgroup, subtype) AS (
+            VALUES {subtype_values}
+        ),
+        balance_map (prefix, section, subsection, "group", subgroup, sort_order) AS (
+            VALUES {balance_values}
+        ),
+        pyg_map (prefix, section, "group", subgroup, sort_order) AS (
+            VALUES {pyg_values}
+        ),
+        padded AS (
+            -- Rellenar a 8 dígitos si es necesario
+            SELECT 
+                ha.*,
+                CASE 
+                    WHEN ha.num < 10000000 
+                    THEN ha.num * (10 ^ GREATEST(8 - length(ha.num::text), 0))::bigint
+                    ELSE ha.num
+                END as account_number
+            FROM bronze.holded_accounts ha
+            WHERE ha.num IS NOT NULL
+            {"AND ha.dwh_update_timestamp > %s" if since is not None else ""}
+        ),
+        classified AS (
+            SELECT 
+                p.*,
+                p.account_number::text as num_text,
+                p.account_number / 10000000 as pgc_group,
+                p.account_number / 1000000 as pgc_subgroup
+            FROM padded p
+        )
+        INSERT INTO silver.accounts ({', '.join(ACCOUNT_COLUMNS)})
+        SELECT 
+            c.id,
+            c.account_number,
+            COALESCE(NULLIF(c.name, ''), 'Cuenta ' || c.account_number),
+            COALESCE(NULLIF(c."group", ''), 'Sin Grupo'),
+            CASE 
+                WHEN c.pgc_group = 1 AND c.pgc_subgroup <= 13 THEN 'Equity'
+                WHEN c.pgc_group = 1 THEN 'Liability'
+                WHEN c.pgc_group = 4 AND c.pgc_subgroup IN (40, 41, 47) THEN 'Liability'
+                WHEN c.pgc_group = 5 AND c.pgc_subgroup IN (50, 51, 52, 56) THEN 'Liability'
+                WHEN c.pgc_group IN (2, 3, 4, 5) THEN 'Asset'
+                WHEN c.pgc_group = 6 THEN 'Expense'
+                WHEN c.pgc_group = 7 THEN 'Income'
+                ELSE 'Unknown'
+            END,
+            COALESCE(sm.subtype, 'Subgrupo ' || c.pgc_subgroup),
+            bm.section,
+            bm.subsection,
+            bm."group",
+            bm.subgroup,
+            pm.section,
+            pm."group",
+            pm.subgroup,
+            COALESCE(bm.sort_order, 999),
+            COALESCE(pm.sort_order, 999),
+            TRUE,
+            (c.account_number / 10) * 10,
+            5,
+            TRUE,
+            COALESCE(c.balance, 0),
+            COALESCE(c.debit, 0),
+            COALESCE(c.credit, 0),
+            CASE WHEN c.debit > 0 OR c.credit > 0 THEN c.dwh_update_timestamp::date END,
+            c.pgc_group,
+            c.pgc_subgroup,
+            c.account_number / 10000,
+            left(c.num_text, 3) IN ('472', '473', '477')
+                OR left(c.num_text, 4) IN ('4740', '4745')
+                OR left(c.num_text, 1) IN ('6', '7'),
+            'bronze.holded_accounts',
+            %s
+        FROM classified c
+        LEFT JOIN subtype_map sm ON sm.subgroup = c.pgc_subgroup
+        -- El código que sea el prefijo más largo de la cuenta (como get_balance_mapping)
+        LEFT JOIN LATERAL (
+            SELECT * FROM balance_map b
+            WHERE c.num_text LIKE b.prefix || '%%'
+            ORDER BY length(b.prefix) DESC
+            LIMIT 1
+        ) bm ON TRUE
+        -- PyG solo para cuentas de los grupos 6 y 7 (como get_pyg_mapping)
+        LEFT JOIN LATERAL (
+            SELECT * FROM pyg_map pg
+            WHERE left(c.num_text, 1) IN ('6', '7')
+            AND c.num_text LIKE pg.prefix || '%%'
+            ORDER BY length(pg.prefix) DESC
+            LIMIT 1
+        ) pm ON TRUE
+        {"" if full_refresh else ACCOUNTS_ON_CONFLICT_SQL}
+        """
+        params = (batch_id,) if since is None else (since, batch_id)
+        
+        # Si es full refresh, truncar la tabla destino
+        if full_refresh:
+            logger.info("Truncando tabla silver.accounts para full refresh")
+            cursor.execute("TRUNCATE TABLE silver.accounts CASCADE")
+        
+        logger.info("Cargando silver.accounts con INSERT ... SELECT desde bronze.holded_accounts")
+        cursor.execute(insert_query, params)
+        count = cursor.rowcount
+        conn.commit()
+        
+        logger.info(f"Carga completada. {count} registros insertados en silver.accounts")
+        if verify:
+            log_account_stats(cursor)
         
         cursor.close()
         return count
         
     except Exception as e:
         conn.rollback()
-        logger.error(f"Error al cargar datos en silver.accounts: {str(e)}")
+        logger.error(f"Error al cargar silver.accounts en base de datos: {str(e)}")
         if 'cursor' in locals():
             cursor.close()
         raise
 
-def load_accounts(full_refresh: bool = True) -> bool:
+def load_accounts(full_refresh: bool = True, in_database: bool = False,
+                  chunksize: Optional[int] = 50000, verify: bool = False,
+                  workers: int = 1) -> bool:
     """
     Función principal para orquestar el proceso ETL de cuentas.
     
     Args:
         full_refresh: Si es True, realizar full refresh en lugar de carga incremental
+        in_database: Si es True, transformar y cargar con un INSERT ... SELECT en la base de datos
+        chunksize: Filas por bloque al extraer, transformar y cargar; None procesa todo de una vez
+        verify: Si es True, comprobar los recuentos consultando silver.accounts tras la carga
+        workers: Procesos para transformar los bloques en paralelo (requiere chunksize)
         
     Returns:
         True si la carga fue exitosa, False en caso contrario
@@ -618,20 +1144,41 @@ def load_accounts(full_refresh: bool = True) -> bool:
     logger.info(f"Iniciando proceso ETL de cuentas a las {start_time}")
     
     try:
-        # Obtener conexión a la base de datos
-        conn = get_db_connection()
-        
-        # Extraer datos de la capa bronze
-        df_accounts = extract_bronze_accounts(conn)
-        
-        # Transformar datos
-        transformed_data = transform_accounts_data(df_accounts)
-        
-        # Cargar datos en la capa silver
-        inserted_count = load_accounts_to_silver(conn, transformed_data, full_refresh)
-        
-        # Cerrar conexión
-        conn.close()
+        # Tomar una conexión del pool, que se devuelve al salir del bloque
+        with db_connection() as conn:
+            # En cargas incrementales solo se procesan las cuentas modificadas desde la última carga
+            since = None if full_refresh else get_accounts_watermark(conn)
+            if since is not None:
+                logger.info(f"Carga incremental de cuentas actualizadas después de {since}")
+            
+            if in_database:
+                # Transformar y cargar sin sacar los datos de la base de datos
+                inserted_count = load_accounts_in_database(conn, full_refresh, verify, since)
+            elif chunksize:
+                # Extraer, transformar y cargar bloque a bloque con un mismo batch_id
+                batch_id = datetime.now().strftime("%Y%m%d%H%M%S")
+                df_chunks = iter_bronze_accounts(conn, chunksize, since)
+                if workers > 1:
+                    chunks = transform_account_chunks_parallel(df_chunks, batch_id, workers)
+                else:
+                    chunks = (transform_accounts_data(df_chunk, batch_id) for df_chunk in df_chunks)
+                
+                # Extraer y transformar el siguiente bloque mientras se carga el actual
+                chunks = iter_in_background(chunks)
+                inserted_count = load_account_chunks_to_silver(conn, chunks, full_refresh, verify)
+            else:
+                # Extraer datos de la capa bronze
+                df_accounts = extract_bronze_accounts(conn, since)
+                
+                if df_accounts.empty:
+                    logger.info("No hay cuentas nuevas o modificadas en bronze.holded_accounts")
+                    inserted_count = 0
+                else:
+                    # Transformar datos
+                    transformed_data = transform_accounts_data(df_accounts)
+                    
+                    # Cargar datos en la capa silver
+                    inserted_count = load_accounts_to_silver(conn, transformed_data, full_refresh, verify)
         
         # Registrar finalización
         end_time = datetime.now()
@@ -650,8 +1197,13 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description='Cargar cuentas en la capa silver')
     parser.add_argument('--full-refresh', action='store_true', help='Realizar full refresh en lugar de carga incremental')
+    parser.add_argument('--in-database', action='store_true', help='Transformar y cargar con INSERT ... SELECT en la base de datos')
+    parser.add_argument('--chunksize', type=int, default=50000, help='Filas por bloque (0 para procesar todo de una vez)')
+    parser.add_argument('--verify', action='store_true', help='Comprobar los recuentos consultando silver.accounts tras la carga')
+    parser.add_argument('--workers', type=int, default=1, help='Procesos para transformar los bloques en paralelo')
     
     args = parser.parse_args()
     
-    success = load_accounts(full_refresh=args.full_refresh)
+    success = load_accounts(full_refresh=args.full_refresh, in_database=args.in_database,
+                            chunksize=args.chunksize, verify=args.verify, workers=args.workers)
     exit(0 if success else 1)
\ No newline at end of file
@@ -8,7 +8,8 @@ based on the date range found in transaction data from the bronze layer.
 import os
 import logging
 import pandas as pd
-from datetime import datetime, date, timedelta
+from psycopg2.extras import execute_values
+from datetime import datetime, date
 from typing import List, Tuple, Optional
 
 # Configure logging
@@ -19,7 +20,13 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Import utility functions
-from utils import get_db_connection
+from utils import db_connection, verbose_stats_enabled
+
+# Columns of silver.fiscal_periods in the order of the generated tuples
+FISCAL_PERIOD_COLUMNS = (
+    'period_year', 'period_quarter', 'period_month', 'period_name',
+    'start_date', 'end_date', 'is_closed', 'closing_date',
+)
 
 def determine_date_range(conn) -> Tuple[date, date]:
     """
@@ -37,13 +44,17 @@ def determine_date_range(conn) -> Tuple[date, date]:
         logger.info("Determining date range from bronze.holded_dailyledger")
         cursor = conn.cursor()
         
-        # Get the minimum timestamp (earliest transaction)
+        # Get the minimum timestamp (earliest transaction), read from the
+        # timestamp index; the end of the range does not depend on the data
         cursor.execute("""
-            SELECT MIN(timestamp), MAX(timestamp)
+            SELECT timestamp
             FROM bronze.holded_dailyledger
+            ORDER BY timestamp
+            LIMIT 1
         """)
         
-        min_timestamp, max_timestamp = cursor.fetchone()
+        row = cursor.fetchone()
+        min_timestamp = row[0] if row else None
         
         if min_timestamp is None:
             # No data available, use a default range
@@ -54,7 +65,6 @@ def determine_date_range(conn) -> Tuple[date, date]:
         else:
             # Convert timestamps to dates
             min_date = datetime.fromtimestamp(min_timestamp).date()
-            max_date = datetime.fromtimestamp(max_timestamp).date()
             
             # Set start date to first day of the month for the earliest transaction
             start_date = date(min_date.year, min_date.month, 1)
@@ -85,63 +95,62 @@ def generate_fiscal_periods(start_date: date, end_date: date) -> List[Tuple]:
     """
     logger.info(f"Generating fiscal periods from {start_date} to {end_date}")
     
-    periods = []
-    current_date = start_date
+    # One period per month: month starts and their month ends
+    starts = pd.date_range(start_date, end_date, freq='MS')
+    ends = starts + pd.offsets.MonthEnd(0)
     
-    # Generate periods until we reach the end date
-    while current_date <= end_date:
-        year = current_date.year
-        month = current_date.month
-        quarter = (month - 1) // 3 + 1
-        
-        # Calculate end date of this month
-        if month == 12:
-            last_day = 31
-        else:
-            next_month = date(year if month < 12 else year + 1, 
-                            (month % 12) + 1, 1)
-            last_day = (next_month - timedelta(days=1)).day
-        
-        end_of_month = date(year, month, last_day)
-        
-        # Create period name (e.g., "2023-01" for January 2023)
-        period_name = f"{year}-{month:02d}"
-        
-        # Determine if period is closed (historical periods)
-        today = date.today()
-        is_closed = end_of_month < date(today.year, today.month, 1)
-        
-        # Create fiscal period tuple
-        period = (
-            year,                # period_year
-            quarter,             # period_quarter
-            month,               # period_month
-            period_name,         # period_name
-            current_date,        # start_date
-            end_of_month,        # end_date
-            is_closed,           # is_closed
-            None if not is_closed else end_of_month  # closing_date
-        )
-        
-        periods.append(period)
-        
-        # Move to next month
-        if month == 12:
-            current_date = date(year + 1, 1, 1)
-        else:
-            current_date = date(year, month + 1, 1)
+    # Periods ending before the current month are closed (historical periods)
+    today = date.today()
+    is_closed = (ends < pd.Timestamp(today.year, today.month, 1)).tolist()
+    end_dates = ends.date.tolist()
+    
+    periods = list(zip(
+        starts.year.tolist(),                           # period_year
+        ((starts.month - 1) // 3 + 1).tolist(),         # period_quarter
+        starts.month.tolist(),                          # period_month
+        starts.strftime('%Y-%m').tolist(),              # period_name (e.g. "2023-01")
+        starts.date.tolist(),                           # start_date
+        end_dates,                                      # end_date
+        is_closed,                                      # is_closed
+        [end if closed else None                        # closing_date
+         for end, closed in zip(end_dates, is_closed)]
+    ))
     
     logger.info(f"Generated {len(periods)} fiscal periods")
     return periods
 
+def log_load_stats(cursor) -> None:
+    """
+    Log the number of fiscal periods per year in silver.fiscal_periods.
+    
+    Args:
+        cursor: Database cursor
+    """
+    cursor.execute("""
+        SELECT period_year, COUNT(*) 
+        FROM silver.fiscal_periods 
+        GROUP BY period_year 
+        ORDER BY period_year
+    """)
+    
+    year_stats = cursor.fetchall()
+    logger.info("Fiscal periods by year:")
+    for year, year_count in year_stats:
+        logger.info("  %s: %d periods", year, year_count)
+
 def load_fiscal_periods(conn, periods: List[Tuple], full_refresh: bool = False) -> int:
     """
     Load fiscal periods into the silver.fiscal_periods table.
     
+    silver.journal_entries and silver.account_balances reference
+    silver.fiscal_periods through period_id, so Postgres rejects a TRUNCATE
+    of it. A full refresh therefore upserts every period as well, which
+    keeps existing period_ids (and the rows referencing them) intact.
+    
     Args:
         conn: Database connection
         periods: List of fiscal period tuples
-        full_refresh: If True, truncate the table before inserting
+        full_refresh: If True, regenerate all periods (loaded the same way, by upsert)
         
     Returns:
         Number of periods loaded
@@ -153,60 +162,31 @@ def load_fiscal_periods(conn, periods: List[Tuple], full_refresh: bool = False)
     try:
         cursor = conn.cursor()
         
-        # If full refresh, truncate the table
         if full_refresh:
-            logger.info("Truncating silver.fiscal_periods for full refresh")
-            cursor.execute("TRUNCATE TABLE silver.fiscal_periods CASCADE")
-        
-        # Insert or update periods
-        for period in periods:
-            year, quarter, month, name, start, end, closed, closing = period
-            
-            if full_refresh:
-                # Simple insert for full refresh
-                cursor.execute("""
-                    INSERT INTO silver.fiscal_periods 
-                    (period_year, period_quarter, period_month, period_name, 
-                     start_date, end_date, is_closed, closing_date)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, period)
-            else:
-                # Upsert for incremental refresh
-                cursor.execute("""
-                    INSERT INTO silver.fiscal_periods 
-                    (period_year, period_quarter, period_month, period_name, 
-                     start_date, end_date, is_closed, closing_date)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (period_year, period_month) DO UPDATE SET
-                        period_quarter = EXCLUDED.period_quarter,
-                        period_name = EXCLUDED.period_name,
-                        start_date = EXCLUDED.start_date,
-                        end_date = EXCLUDED.end_date,
-                        is_closed = EXCLUDED.is_closed,
-                        closing_date = EXCLUDED.closing_date
-                """, period)
+            logger.info("Refreshing all periods in silver.fiscal_periods")
+        
+        # Upsert all periods in multi-row batches
+        execute_values(cursor, f"""
+            INSERT INTO silver.fiscal_periods 
+            ({', '.join(FISCAL_PERIOD_COLUMNS)})
+            VALUES %s
+            ON CONFLICT (period_year, period_month) DO UPDATE SET
+                period_quarter = EXCLUDED.period_quarter,
+                period_name = EXCLUDED.period_name,
+                start_date = EXCLUDED.start_date,
+                end_date = EXCLUDED.end_date,
+                is_closed = EXCLUDED.is_closed,
+                closing_date = EXCLUDED.closing_date
+        """, periods, page_size=1000)
         
         # Commit changes
         conn.commit()
         
-        # Get count of periods in the table
-        cursor.execute("SELECT COUNT(*) FROM silver.fiscal_periods")
-        count = cursor.fetchone()[0]
-        
+        count = len(periods)
         logger.info(f"Successfully loaded {count} fiscal periods")
         
-        # Log period distribution
-        cursor.execute("""
-            SELECT period_year, COUNT(*) 
-            FROM silver.fiscal_periods 
-            GROUP BY period_year 
-            ORDER BY period_year
-        """)
-        
-        year_stats = cursor.fetchall()
-        logger.info("Fiscal periods by year:")
-        for year, year_count in year_stats:
-            logger.info(f"  {year}: {year_count} periods")
+        if verbose_stats_enabled(logger):
+            log_load_stats(cursor)
         
         cursor.close()
         return count
@@ -232,20 +212,16 @@ def load_fiscal_periods_main(full_refresh: bool = True) -> bool:
     logger.info(f"Starting fiscal periods ETL process at {start_time}")
     
     try:
-        # Get database connection
-        conn = get_db_connection()
-        
-        # Determine date range
-        start_date, end_date = determine_date_range(conn)
-        
-        # Generate fiscal periods
-        periods = generate_fiscal_periods(start_date, end_date)
-        
-        # Load periods into silver layer
-        loaded_count = load_fiscal_periods(conn, periods, full_refresh)
-        
-        # Close connection
-        conn.close()
+        # Borrow a connection from the pool, returned when the block exits
+        with db_connection() as conn:
+            # Determine date range
+            start_date, end_date = determine_date_range(conn)
+            
+            # Generate fiscal periods
+            periods = generate_fiscal_periods(start_date, end_date)
+            
+            # Load periods into silver layer
+            loaded_count = load_fiscal_periods(conn, periods, full_refresh)
         
         # Log completion
         end_time = datetime.now()
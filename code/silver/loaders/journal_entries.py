@@ -7,10 +7,12 @@ relationships with fiscal periods.
 """
 
 import os
+import re
 import logging
 import pandas as pd
+from psycopg2.extras import execute_values
 from datetime import datetime, date
-from typing import List, Tuple, Dict, Optional
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 
 # Configure logging
 logging.basicConfig(
@@ -20,11 +22,63 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Import utility functions
-from utils import get_db_connection
+from utils import (
+    db_connection, copy_query_to_dataframe, copy_rows_to_table,
+    drop_secondary_indexes, recreate_indexes, iter_in_background, verbose_stats_enabled,
+    ColumnRows, COPY_ROW_THRESHOLD
+)
+
+# Columns of silver.journal_entries in the order of the transformed tuples
+JOURNAL_ENTRY_COLUMNS = (
+    'entry_number', 'entry_date', 'original_timestamp', 'period_id',
+    'entry_type', 'description', 'document_description',
+    'is_closing_entry', 'is_opening_entry', 'is_adjustment',
+    'is_checked', 'entry_status', 'total_debit', 'total_credit',
+    'dwh_created_at', 'dwh_updated_at', 'dwh_source_table', 'dwh_batch_id',
+)
+
+# Description keywords (Spanish or English) that flag special entry types
+CLOSING_ENTRY_RE = re.compile('CIERRE|CLOSING', re.IGNORECASE)
+OPENING_ENTRY_RE = re.compile('APERTURA|OPENING', re.IGNORECASE)
+ADJUSTMENT_ENTRY_RE = re.compile('AJUSTE|ADJUSTMENT', re.IGNORECASE)
+
+# Column types of the aggregated extract in the COPY CSV output
+_BRONZE_ENTRIES_DTYPES = {
+    'entrynumber': 'int64', 'timestamp': 'int64', 'description': 'string',
+    'docdescription': 'string', 'type': 'string',
+    'total_debit': 'float64', 'total_credit': 'float64', 'period_id': 'Int64'
+}
+
+# Entries aggregated from their ledger lines, with the fiscal period containing each entry's date
+BRONZE_ENTRIES_QUERY = """
+WITH entries AS (
+    SELECT 
+        entrynumber,
+        MIN(timestamp) as timestamp,
+        -- Date in the session time zone, used for both entry_date and period_id
+        to_timestamp(MIN(timestamp))::date as entry_date,
+        MAX(description) as description,
+        MAX(docdescription) as docdescription,
+        MAX(type) as type,
+        SUM(debit) as total_debit,
+        SUM(credit) as total_credit,
+        MAX(dwh_update_timestamp) as last_update
+    FROM bronze.holded_dailyledger
+    GROUP BY entrynumber
+)
+SELECT 
+    e.*,
+    fp.period_id
+FROM entries e
+LEFT JOIN silver.fiscal_periods fp
+    ON e.entry_date BETWEEN fp.start_date AND fp.end_date
+ORDER BY e.entrynumber
+"""
 
 def extract_bronze_journal_entries(conn) -> pd.DataFrame:
     """
-    Extract journal entries from bronze.holded_dailyledger, aggregated by entry number.
+    Extract journal entries from bronze.holded_dailyledger, aggregated by entry number,
+    together with the fiscal period that contains each entry's date.
     
     Args:
         conn: Database connection
@@ -33,23 +87,12 @@ def extract_bronze_journal_entries(conn) -> pd.DataFrame:
         DataFrame with aggregated journal entries
     """
     try:
-        query = """
-        SELECT 
-            entrynumber,
-            MIN(timestamp) as timestamp,
-            MAX(description) as description,
-            MAX(docdescription) as docdescription,
-            MAX(type) as type,
-            SUM(debit) as total_debit,
-            SUM(credit) as total_credit,
-            MAX(dwh_update_timestamp) as last_update
-        FROM bronze.holded_dailyledger
-        GROUP BY entrynumber
-        ORDER BY entrynumber
-        """
-        
         logger.info("Extracting journal entries from bronze.holded_dailyledger")
-        df = pd.read_sql(query, conn)
+        df = copy_query_to_dataframe(
+            conn, BRONZE_ENTRIES_QUERY,
+            dtype=_BRONZE_ENTRIES_DTYPES,
+            parse_dates=['entry_date', 'last_update']
+        )
         
         logger.info(f"Extracted {len(df)} journal entries from bronze layer")
         return df
@@ -58,204 +101,235 @@ def extract_bronze_journal_entries(conn) -> pd.DataFrame:
         logger.error(f"Error extracting bronze journal entries: {str(e)}")
         raise
 
-def get_fiscal_periods(conn) -> Dict[Tuple[int, int], int]:
+def iter_bronze_journal_entries(conn, chunksize: int = 50000) -> Iterator[pd.DataFrame]:
     """
-    Get mapping of date ranges to period IDs for all fiscal periods.
+    Extract journal entries from bronze.holded_dailyledger in chunks.
+    
+    The whole COPY output is buffered in memory as CSV first; it is then
+    parsed chunksize rows at a time, so the DataFrame (and transformed rows)
+    of only one chunk exist at once, next to that raw CSV buffer.
     
     Args:
         conn: Database connection
+        chunksize: Number of entries per chunk
         
     Returns:
-        Dictionary mapping (start_timestamp, end_timestamp) to period_id
+        Iterator of DataFrames with aggregated journal entries
     """
-    try:
-        query = """
-        SELECT 
-            period_id, 
-            start_date, 
-            end_date
-        FROM silver.fiscal_periods
-        ORDER BY start_date
-        """
-        
-        logger.info("Fetching fiscal periods for mapping")
-        cursor = conn.cursor()
-        cursor.execute(query)
-        periods = cursor.fetchall()
-        cursor.close()
-        
-        # Create mapping of date ranges to period IDs
-        period_map = {}
-        
-        for period_id, start_date, end_date in periods:
-            # Convert dates to timestamps for comparison with journal entries
-            start_timestamp = int(datetime.combine(start_date, datetime.min.time()).timestamp())
-            end_timestamp = int(datetime.combine(end_date, datetime.max.time()).timestamp())
-            period_map[(start_timestamp, end_timestamp)] = period_id
-        
-        logger.info(f"Fetched {len(period_map)} fiscal periods")
-        return period_map
+    logger.info(f"Extracting journal entries from bronze.holded_dailyledger in chunks of {chunksize}")
+    reader = copy_query_to_dataframe(
+        conn, BRONZE_ENTRIES_QUERY,
+        dtype=_BRONZE_ENTRIES_DTYPES,
+        parse_dates=['entry_date', 'last_update'],
+        chunksize=chunksize
+    )
     
-    except Exception as e:
-        logger.error(f"Error fetching fiscal periods: {str(e)}")
-        if 'cursor' in locals():
-            cursor.close()
-        raise
+    extracted = 0
+    for df_chunk in reader:
+        extracted += len(df_chunk)
+        yield df_chunk
+    
+    logger.info(f"Extracted {extracted} journal entries from bronze layer")
 
-def transform_journal_entries(df: pd.DataFrame, period_map: Dict[Tuple[int, int], int]) -> List[Tuple]:
+def _text_values(column: pd.Series) -> List[Optional[str]]:
+    """
+    Convert a nullable 'string' column to a list of str, with None for NULL.
+    """
+    return column.astype(object).where(column.notna(), None).tolist()
+
+def transform_journal_entries(df: pd.DataFrame, batch_id: Optional[str] = None) -> Sequence[Tuple]:
     """
     Transform and enrich journal entries data for silver layer.
     
+    The fiscal period is assigned in the extract query; the entry type flags
+    are computed column-wise.
+    
     Args:
-        df: DataFrame with bronze journal entries data
-        period_map: Mapping of date ranges to period IDs
+        df: DataFrame with bronze journal entries data and their period_id
+        batch_id: Batch identifier (defaults to the current date and time)
         
     Returns:
-        List of tuples with transformed data ready for insertion
+        Sequence of tuples with transformed data ready for insertion
     """
     logger.info("Transforming journal entries data for silver.journal_entries")
     
-    batch_id = datetime.now().strftime("%Y%m%d%H%M%S")
-    transformed_data = []
+    batch_id = batch_id or datetime.now().strftime("%Y%m%d%H%M%S")
+    if df.empty:
+        logger.info("Transformation completed. 0 journal entries processed")
+        return []
     
-    for _, row in df.iterrows():
-        # Convert timestamp to date
-        entry_date = datetime.fromtimestamp(row['timestamp']).date()
-        
-        # Determine fiscal period
-        period_id = None
-        entry_timestamp = row['timestamp']
-        
-        for (start_timestamp, end_timestamp), pid in period_map.items():
-            if start_timestamp <= entry_timestamp <= end_timestamp:
-                period_id = pid
-                break
-        
-        # If no period found, log warning but continue
-        if period_id is None:
-            logger.warning(f"No fiscal period found for entry {row['entrynumber']} with date {entry_date}")
-        
-        # Determine if this is a special entry type
-        description = str(row['description'] or '')
-        is_closing_entry = "CIERRE" in description.upper() or "CLOSING" in description.upper()
-        is_opening_entry = "APERTURA" in description.upper() or "OPENING" in description.upper()
-        is_adjustment = "AJUSTE" in description.upper() or "ADJUSTMENT" in description.upper()
-        
-        # Create data tuple for insertion
-        entry_data = (
-            row['entrynumber'],         # entry_number
-            entry_date,                 # entry_date
-            row['timestamp'],           # original_timestamp
-            period_id,                  # period_id
-            row['type'],                # entry_type
-            row['description'],         # description
-            row['docdescription'],      # document_description
-            is_closing_entry,           # is_closing_entry
-            is_opening_entry,           # is_opening_entry
-            is_adjustment,              # is_adjustment
-            False,                      # is_checked - default to False
-            'Posted',                   # entry_status - default to Posted
-            row['total_debit'] or 0,    # total_debit
-            row['total_credit'] or 0,   # total_credit
-            datetime.now(),             # dwh_created_at
-            datetime.now(),             # dwh_updated_at
-            'bronze.holded_dailyledger', # dwh_source_table
-            batch_id                    # dwh_batch_id
-        )
-        
-        transformed_data.append(entry_data)
+    in_period = df['period_id'].notna()
+    period_ids = df['period_id'].astype(object).where(in_period, None)
+    
+    # entry_date comes from the extract, from the same expression as period_id
+    timestamps = df['timestamp'].tolist()
+    entry_dates = df['entry_date'].dt.date.tolist()
+    
+    # If no period found, log one warning but continue
+    missing_periods = int((~in_period).sum())
+    if missing_periods:
+        missing_entries = df.loc[~in_period, 'entrynumber'].tolist()
+        logger.warning("No fiscal period found for %d entries (first entry numbers: %s)",
+                       missing_periods, missing_entries[:20])
+    
+    # Determine special entry types from the description (nullable 'string'
+    # column: missing descriptions simply do not match)
+    description = df['description']
+    is_closing_entry = description.str.contains(CLOSING_ENTRY_RE, na=False)
+    is_opening_entry = description.str.contains(OPENING_ENTRY_RE, na=False)
+    is_adjustment = description.str.contains(ADJUSTMENT_ENTRY_RE, na=False)
+    
+    # Rows are assembled lazily from the column lists while they are loaded
+    now = datetime.now()
+    n = len(df)
+    transformed_data = ColumnRows(
+        df['entrynumber'].tolist(),                 # entry_number
+        entry_dates,                                # entry_date
+        timestamps,                                 # original_timestamp
+        period_ids.tolist(),                        # period_id
+        _text_values(df['type']),                   # entry_type
+        _text_values(description),                  # description
+        _text_values(df['docdescription']),         # document_description
+        is_closing_entry.tolist(),                  # is_closing_entry
+        is_opening_entry.tolist(),                  # is_opening_entry
+        is_adjustment.tolist(),                     # is_adjustment
+        [False] * n,                                # is_checked - default to False
+        ['Posted'] * n,                             # entry_status - default to Posted
+        df['total_debit'].fillna(0).tolist(),       # total_debit
+        df['total_credit'].fillna(0).tolist(),      # total_credit
+        [now] * n,                                  # dwh_created_at
+        [now] * n,                                  # dwh_updated_at
+        ['bronze.holded_dailyledger'] * n,          # dwh_source_table
+        [batch_id] * n                              # dwh_batch_id
+    )
     
     logger.info(f"Transformation completed. {len(transformed_data)} journal entries processed")
     return transformed_data
 
-def load_journal_entries(conn, entries_data: List[Tuple], full_refresh: bool = False) -> int:
+def log_load_stats(cursor) -> None:
+    """
+    Log the number of journal entries and total debits per month in
+    silver.journal_entries.
+    
+    Args:
+        cursor: Database cursor
+    """
+    cursor.execute("""
+        SELECT 
+            date_trunc('month', entry_date)::date as month,
+            COUNT(*) as entry_count,
+            SUM(total_debit) as total_amount
+        FROM silver.journal_entries
+        GROUP BY date_trunc('month', entry_date)
+        ORDER BY month
+    """)
+    
+    month_stats = cursor.fetchall()
+    logger.info("Journal entries by month:")
+    for month, entry_count, total_amount in month_stats:
+        logger.info("  %s: %d entries, %.2f in total debits", month, entry_count, total_amount)
+
+# Upsert in multi-row batches (after a TRUNCATE there are simply no conflicts)
+UPSERT_JOURNAL_ENTRIES_SQL = """
+INSERT INTO silver.journal_entries (
+    entry_number, entry_date, original_timestamp, period_id,
+    entry_type, description, document_description,
+    is_closing_entry, is_opening_entry, is_adjustment,
+    is_checked, entry_status, total_debit, total_credit,
+    dwh_created_at, dwh_updated_at, dwh_source_table, dwh_batch_id
+) VALUES %s
+ON CONFLICT (entry_number) DO UPDATE SET
+    entry_date = EXCLUDED.entry_date,
+    original_timestamp = EXCLUDED.original_timestamp,
+    period_id = EXCLUDED.period_id,
+    entry_type = EXCLUDED.entry_type,
+    description = EXCLUDED.description,
+    document_description = EXCLUDED.document_description,
+    is_closing_entry = EXCLUDED.is_closing_entry,
+    is_opening_entry = EXCLUDED.is_opening_entry,
+    is_adjustment = EXCLUDED.is_adjustment,
+    total_debit = EXCLUDED.total_debit,
+    total_credit = EXCLUDED.total_credit,
+    dwh_updated_at = CURRENT_TIMESTAMP,
+    dwh_batch_id = EXCLUDED.dwh_batch_id
+"""
+
+def load_journal_entries(conn, entries_data: Sequence[Tuple], full_refresh: bool = False) -> int:
     """
     Load transformed journal entries into silver.journal_entries table.
     
+    silver.journal_lines references silver.journal_entries through
+    entry_id, so a full refresh truncates both tables together; the journal
+    lines loader must be run again afterwards.
+    
     Args:
         conn: Database connection
-        entries_data: List of tuples with transformed data
-        full_refresh: If True, truncate target table before loading
+        entries_data: Sequence of tuples with transformed data
+        full_refresh: If True, truncate target table (and silver.journal_lines) before loading
         
     Returns:
         Number of records inserted
     """
-    if not entries_data:
-        logger.warning("No data to load into silver.journal_entries")
-        return 0
+    return load_journal_entry_chunks(conn, [entries_data], full_refresh)
+
+def load_journal_entry_chunks(conn, chunks: Iterable[Sequence[Tuple]], full_refresh: bool = False) -> int:
+    """
+    Load chunks of transformed journal entries into silver.journal_entries
+    within a single transaction.
     
+    Args:
+        conn: Database connection
+        chunks: Iterable of sequences of tuples with transformed data
+        full_refresh: If True, truncate target table (and silver.journal_lines) before loading
+        
+    Returns:
+        Number of records inserted
+    """
     try:
         cursor = conn.cursor()
         
-        # If full refresh, truncate target table
+        # If full refresh, truncate target table together with silver.journal_lines,
+        # which references it (a TRUNCATE of journal_entries alone is rejected)
         if full_refresh:
-            logger.info("Truncating silver.journal_entries table for full refresh")
-            cursor.execute("TRUNCATE TABLE silver.journal_entries CASCADE")
+            logger.info("Truncating silver.journal_entries and silver.journal_lines for full refresh")
+            cursor.execute("TRUNCATE TABLE silver.journal_entries, silver.journal_lines")
+        
+        # Load the emptied table without its secondary indexes and rebuild
+        # them once afterwards. This runs in the load transaction, so a
+        # failure rolls the dropped indexes back as well
+        index_defs = drop_secondary_indexes(cursor, 'silver.journal_entries') if full_refresh else []
+        
+        count = 0
+        for entries_data in chunks:
+            if not entries_data:
+                continue
+            
+            if full_refresh and len(entries_data) > COPY_ROW_THRESHOLD:
+                # Nothing to conflict with after the TRUNCATE: stream the rows with COPY
+                copy_rows_to_table(cursor, 'silver.journal_entries', JOURNAL_ENTRY_COLUMNS, entries_data)
+            else:
+                # Execute batch insert
+                execute_values(cursor, UPSERT_JOURNAL_ENTRIES_SQL, entries_data, page_size=1000)
+            
+            count += len(entries_data)
+        
+        if count == 0:
+            # No data: leave the target table untouched
+            logger.warning("No data to load into silver.journal_entries")
+            conn.rollback()
+            cursor.close()
+            return 0
         
-        # Prepare insert query
         if full_refresh:
-            insert_query = """
-            INSERT INTO silver.journal_entries (
-                entry_number, entry_date, original_timestamp, period_id,
-                entry_type, description, document_description,
-                is_closing_entry, is_opening_entry, is_adjustment,
-                is_checked, entry_status, total_debit, total_credit,
-                dwh_created_at, dwh_updated_at, dwh_source_table, dwh_batch_id
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-        else:
-            # For incremental loads, use upsert pattern
-            insert_query = """
-            INSERT INTO silver.journal_entries (
-                entry_number, entry_date, original_timestamp, period_id,
-                entry_type, description, document_description,
-                is_closing_entry, is_opening_entry, is_adjustment,
-                is_checked, entry_status, total_debit, total_credit,
-                dwh_created_at, dwh_updated_at, dwh_source_table, dwh_batch_id
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (entry_number) DO UPDATE SET
-                entry_date = EXCLUDED.entry_date,
-                original_timestamp = EXCLUDED.original_timestamp,
-                period_id = EXCLUDED.period_id,
-                entry_type = EXCLUDED.entry_type,
-                description = EXCLUDED.description,
-                document_description = EXCLUDED.document_description,
-                is_closing_entry = EXCLUDED.is_closing_entry,
-                is_opening_entry = EXCLUDED.is_opening_entry,
-                is_adjustment = EXCLUDED.is_adjustment,
-                total_debit = EXCLUDED.total_debit,
-                total_credit = EXCLUDED.total_credit,
-                dwh_updated_at = CURRENT_TIMESTAMP,
-                dwh_batch_id = EXCLUDED.dwh_batch_id
-            """
-        
-        # Execute batch insert
-        for entry in entries_data:
-            cursor.execute(insert_query, entry)
+            recreate_indexes(cursor, index_defs)
+            cursor.execute("ANALYZE silver.journal_entries")
         
         conn.commit()
         
-        # Get number of inserted records
-        cursor.execute("SELECT COUNT(*) FROM silver.journal_entries")
-        count = cursor.fetchone()[0]
-        
         logger.info(f"Successfully loaded {count} records into silver.journal_entries")
         
-        # Generate load statistics
-        cursor.execute("""
-            SELECT 
-                date_trunc('month', entry_date)::date as month,
-                COUNT(*) as entry_count,
-                SUM(total_debit) as total_amount
-            FROM silver.journal_entries
-            GROUP BY date_trunc('month', entry_date)
-            ORDER BY month
-        """)
-        
-        month_stats = cursor.fetchall()
-        logger.info("Journal entries by month:")
-        for month, entry_count, total_amount in month_stats:
-            logger.info(f"  {month}: {entry_count} entries, {total_amount:.2f} in total debits")
+        if verbose_stats_enabled(logger):
+            log_load_stats(cursor)
         
         cursor.close()
         return count
@@ -267,12 +341,14 @@ def load_journal_entries(conn, entries_data: List[Tuple], full_refresh: bool = F
             cursor.close()
         raise
 
-def load_journal_entries_main(full_refresh: bool = True) -> bool:
+def load_journal_entries_main(full_refresh: bool = True, chunksize: Optional[int] = 50000) -> bool:
     """
     Main function to orchestrate the ETL process for journal entries.
     
     Args:
         full_refresh: If True, perform full refresh instead of incremental load
+            (also empties silver.journal_lines, which must be reloaded)
+        chunksize: Entries per chunk to extract, transform and load; None processes everything at once
         
     Returns:
         True if load was successful, False otherwise
@@ -281,23 +357,26 @@ def load_journal_entries_main(full_refresh: bool = True) -> bool:
     logger.info(f"Starting journal entries ETL process at {start_time}")
     
     try:
-        # Get database connection
-        conn = get_db_connection()
-        
-        # Extract data from bronze layer
-        df_entries = extract_bronze_journal_entries(conn)
-        
-        # Get fiscal periods mapping
-        period_map = get_fiscal_periods(conn)
-        
-        # Transform data
-        transformed_data = transform_journal_entries(df_entries, period_map)
-        
-        # Load data into silver layer
-        inserted_count = load_journal_entries(conn, transformed_data, full_refresh)
-        
-        # Close connection
-        conn.close()
+        # Borrow a connection from the pool, returned when the block exits
+        with db_connection() as conn:
+            if chunksize:
+                # Extract, transform and load chunk by chunk under one batch_id,
+                # preparing the next chunk in the background while one is loaded
+                batch_id = datetime.now().strftime("%Y%m%d%H%M%S")
+                chunks = iter_in_background(
+                    transform_journal_entries(df_chunk, batch_id)
+                    for df_chunk in iter_bronze_journal_entries(conn, chunksize)
+                )
+                inserted_count = load_journal_entry_chunks(conn, chunks, full_refresh)
+            else:
+                # Extract data from bronze layer
+                df_entries = extract_bronze_journal_entries(conn)
+                
+                # Transform data
+                transformed_data = transform_journal_entries(df_entries)
+                
+                # Load data into silver layer
+                inserted_count = load_journal_entries(conn, transformed_data, full_refresh)
         
         # Log completion
         end_time = datetime.now()
@@ -315,9 +394,12 @@ if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description='Load journal entries into silver layer')
-    parser.add_argument('--full-refresh', action='store_true', help='Perform full refresh instead of incremental load')
+    parser.add_argument('--full-refresh', action='store_true',
+                        help='Perform full refresh instead of incremental load (also empties silver.journal_lines, '
+                             'which must be reloaded afterwards)')
+    parser.add_argument('--chunksize', type=int, default=50000, help='Entries per chunk (0 to process everything at once)')
     
     args = parser.parse_args()
     
-    success = load_journal_entries_main(full_refresh=args.full_refresh)
+    success = load_journal_entries_main(full_refresh=args.full_refresh, chunksize=args.chunksize)
     exit(0 if success else 1)
\ No newline at end of file
@@ -9,9 +9,9 @@ establishing relationships with journal entries and accounts.
 import os
 import logging
 import pandas as pd
-import json
+from psycopg2.extras import execute_values
 from datetime import datetime
-from typing import List, Tuple, Dict, Optional
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
 
 # Configure logging
 logging.basicConfig(
@@ -21,108 +21,181 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Import utility functions
-from utils import get_db_connection
+from utils import (
+    db_connection, copy_rows_to_table, iter_in_background,
+    verbose_stats_enabled, ColumnRows, COPY_ROW_THRESHOLD
+)
 
-def extract_bronze_journal_lines(conn) -> pd.DataFrame:
+# Columns of silver.journal_lines in the order of the transformed tuples
+JOURNAL_LINE_COLUMNS = (
+    'entry_id', 'line_number', 'account_id', 'account_number',
+    'debit_amount', 'credit_amount', 'description', 'tags',
+    'tag1', 'tag2', 'tag3', 'tag4',
+    'is_checked', 'is_reconciled', 'is_tax_relevant',
+    'cost_center', 'business_line',
+    'dwh_source_table', 'dwh_batch_id',
+)
+
+# Row template for execute_values, with proper JSONB casting for tags
+# (dwh_created_at and dwh_updated_at are left to their CURRENT_TIMESTAMP defaults)
+JOURNAL_LINE_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+
+# Multi-row INSERT of journal lines for execute_values
+INSERT_JOURNAL_LINES_SQL = """
+INSERT INTO silver.journal_lines (
+    entry_id, line_number, account_id, account_number,
+    debit_amount, credit_amount, description, tags,
+    tag1, tag2, tag3, tag4,
+    is_checked, is_reconciled, is_tax_relevant,
+    cost_center, business_line,
+    dwh_source_table, dwh_batch_id
+) VALUES %s
+"""
+
+# Conflict clause shared by the execute_values upsert and the INSERT ... SELECT load
+JOURNAL_LINES_ON_CONFLICT_SQL = """
+ON CONFLICT (entry_id, line_number) DO UPDATE SET
+    account_id = EXCLUDED.account_id,
+    account_number = EXCLUDED.account_number,
+    debit_amount = EXCLUDED.debit_amount,
+    credit_amount = EXCLUDED.credit_amount,
+    description = EXCLUDED.description,
+    tags = EXCLUDED.tags,
+    tag1 = EXCLUDED.tag1,
+    tag2 = EXCLUDED.tag2,
+    tag3 = EXCLUDED.tag3,
+    tag4 = EXCLUDED.tag4,
+    is_checked = EXCLUDED.is_checked,
+    is_reconciled = EXCLUDED.is_reconciled,
+    is_tax_relevant = EXCLUDED.is_tax_relevant,
+    cost_center = EXCLUDED.cost_center,
+    business_line = EXCLUDED.business_line,
+    dwh_updated_at = CURRENT_TIMESTAMP,
+    dwh_batch_id = EXCLUDED.dwh_batch_id
+"""
+
+# Upsert of journal lines, one multi-row INSERT per execute_values page
+UPSERT_JOURNAL_LINES_SQL = f"{INSERT_JOURNAL_LINES_SQL}{JOURNAL_LINES_ON_CONFLICT_SQL}"
+
+# Account prefixes (first 4 digits, and group) that are tax relevant
+TAX_SUBACCOUNTS = frozenset({4720, 4770, 4740, 4745, 4752})
+TAX_GROUPS = frozenset({6, 7})
+
+# is_tax_relevant as a SQL expression over the bronze account number
+TAX_RELEVANT_SQL = (
+    f"(dl.account / 10000 IN ({', '.join(map(str, sorted(TAX_SUBACCOUNTS)))})"
+    f" OR dl.account / 10000000 IN ({', '.join(map(str, sorted(TAX_GROUPS)))}))"
+)
+
+# Journal lines with their entry_id, account_id (NULL for unknown accounts), tax relevance
+# and tags: the first four non-empty tags, and the last CC: (cost center) and BL:
+# (business line) tags. DISTINCT ON keeps one line (the latest) per silver key
+# (entry_id, line_number)
+JOURNAL_LINES_QUERY = f"""
+SELECT DISTINCT ON (je.entry_id, dl.line)
+    dl.entrynumber,
+    dl.line,
+    dl.timestamp,  -- Incluimos el timestamp para identificación única
+    je.entry_id,
+    dl.account,
+    a.account_id,
+    {TAX_RELEVANT_SQL} as is_tax_relevant,
+    dl.debit,
+    dl.credit,
+    dl.description,
+    CASE WHEN dl.tags IS NULL OR dl.tags = 'null'::jsonb THEN '[]'
+         ELSE dl.tags::text END as tags,  -- Forzar conversión a texto para consistencia
+    t.tag1,
+    t.tag2,
+    t.tag3,
+    t.tag4,
+    t.cost_center,
+    t.business_line,
+    dl.checked,
+    dl.dwh_update_timestamp
+FROM bronze.holded_dailyledger dl
+JOIN silver.journal_entries je ON dl.entrynumber = je.entry_number
+    AND dl.timestamp = je.original_timestamp  -- Aseguramos la unión correcta
+LEFT JOIN silver.accounts a ON a.account_number = dl.account
+CROSS JOIN LATERAL (
+    SELECT
+        (array_agg(tag ORDER BY ord))[1] as tag1,
+        (array_agg(tag ORDER BY ord))[2] as tag2,
+        (array_agg(tag ORDER BY ord))[3] as tag3,
+        (array_agg(tag ORDER BY ord))[4] as tag4,
+        (array_agg(substr(tag, 4) ORDER BY ord DESC) FILTER (WHERE tag LIKE 'CC:%'))[1] as cost_center,
+        (array_agg(substr(tag, 4) ORDER BY ord DESC) FILTER (WHERE tag LIKE 'BL:%'))[1] as business_line
+    FROM (
+        SELECT btrim(value) as tag, ord
+        FROM jsonb_array_elements_text(
+            CASE WHEN jsonb_typeof(dl.tags) = 'array' THEN dl.tags ELSE '[]'::jsonb END
+        ) WITH ORDINALITY as e(value, ord)
+        WHERE btrim(value) <> ''
+    ) line_tags
+) t
+ORDER BY je.entry_id, dl.line, dl.timestamp DESC
+"""
+
+def iter_bronze_journal_lines(conn, chunksize: int = 50000) -> Iterator[pd.DataFrame]:
     """
-    Extract journal lines from bronze.holded_dailyledger, joining with silver.journal_entries
-    to get the entry_id for each line.
+    Extract journal lines from bronze.holded_dailyledger in chunks, through a
+    server-side cursor so only one chunk of rows is held in memory.
+    
+    At least one (possibly empty) DataFrame is always yielded.
     
     Args:
         conn: Database connection
+        chunksize: Number of lines per chunk
         
     Returns:
-        DataFrame with journal lines and their corresponding entry_ids
+        Iterator of DataFrames with journal lines and their corresponding entry_ids
     """
+    logger.info(f"Extracting journal lines from bronze.holded_dailyledger in chunks of {chunksize}")
+    
+    cursor = conn.cursor(name='journal_lines_stream')
+    cursor.itersize = chunksize
     try:
-        query = """
-        SELECT 
-            dl.entrynumber,
-            dl.line,
-            dl.timestamp,  -- Incluimos el timestamp para identificación única
-            je.entry_id,
-            dl.account,
-            dl.debit,
-            dl.credit,
-            dl.description,
-            dl.tags::text as tags,  -- Forzar conversión a texto para consistencia
-            dl.checked,
-            dl.dwh_update_timestamp
-        FROM bronze.holded_dailyledger dl
-        JOIN silver.journal_entries je ON dl.entrynumber = je.entry_number
-            AND dl.timestamp = je.original_timestamp  -- Aseguramos la unión correcta
-        ORDER BY dl.entrynumber, dl.timestamp, dl.line
-        """
-        
-        logger.info("Extracting journal lines from bronze.holded_dailyledger")
-        
-        cursor = conn.cursor()
-        cursor.execute(query)
-        columns = [desc[0] for desc in cursor.description]
-        results = cursor.fetchall()
-        cursor.close()
-        
-        df = pd.DataFrame(results, columns=columns)
-        
-        # Examinar el formato de tags para diagnóstico
-        sample_tags = df['tags'].head(5).tolist()
-        logger.info(f"Sample tags format: {sample_tags}")
-        
-        logger.info(f"Extracted {len(df)} journal lines from bronze layer")
+        cursor.execute(JOURNAL_LINES_QUERY)
         
-        # Verificamos duplicados considerando la clave completa
-        duplicate_check = df.duplicated(subset=['entrynumber', 'line', 'timestamp'])
-        if duplicate_check.any():
-            logger.warning(f"Found {duplicate_check.sum()} duplicate rows with identical (entrynumber, line, timestamp)")
-            # Estas sí serían duplicados verdaderos ya que violan la clave primaria
+        extracted = 0
+        while True:
+            rows = cursor.fetchmany(chunksize)
+            if not rows and extracted:
+                break
             
-            duplicates = df[df.duplicated(subset=['entrynumber', 'line', 'timestamp'], keep=False)]
-            logger.warning(f"Detailed info about true duplicates: {duplicates.shape[0]} rows")
+            df = pd.DataFrame(rows, columns=[desc[0] for desc in cursor.description])
+            if not extracted and logger.isEnabledFor(logging.DEBUG):
+                # Examinar el formato de tags para diagnóstico
+                logger.debug(f"Sample tags format: {df['tags'].head(5).tolist()}")
             
-            # En este caso, mantener solo una de las filas es correcto
-            df = df.drop_duplicates(subset=['entrynumber', 'line', 'timestamp'])
-            logger.info(f"After removing true duplicates: {len(df)} journal lines")
-        
-        return df
+            extracted += len(df)
+            # No duplicate check: DISTINCT ON already makes (entry_id, line) unique
+            yield df
+            
+            if not rows:
+                break
+    finally:
+        cursor.close()
     
-    except Exception as e:
-        logger.error(f"Error extracting bronze journal lines: {str(e)}")
-        if 'cursor' in locals() and cursor:
-            cursor.close()
-        raise
+    logger.info(f"Extracted {extracted} journal lines from bronze layer")
 
-def get_accounts_mapping(conn) -> Dict[int, str]:
+def extract_bronze_journal_lines(conn) -> pd.DataFrame:
     """
-    Get mapping of account numbers to account IDs from silver.accounts.
+    Extract journal lines from bronze.holded_dailyledger, joining with silver.journal_entries
+    to get the entry_id for each line and with silver.accounts to get its account_id
+    (NULL for unknown accounts) and tax relevance.
     
     Args:
         conn: Database connection
         
     Returns:
-        Dictionary mapping account_number to account_id
+        DataFrame with journal lines and their corresponding entry_ids
     """
     try:
-        query = """
-        SELECT account_number, account_id
-        FROM silver.accounts
-        """
-        
-        logger.info("Fetching accounts mapping")
-        cursor = conn.cursor()
-        cursor.execute(query)
-        accounts = cursor.fetchall()
-        cursor.close()
-        
-        # Create mapping of account numbers to account IDs
-        account_map = {row[0]: row[1] for row in accounts}
-        
-        logger.info(f"Fetched mapping for {len(account_map)} accounts")
-        return account_map
+        return pd.concat(list(iter_bronze_journal_lines(conn)), ignore_index=True)
     
     except Exception as e:
-        logger.error(f"Error fetching accounts mapping: {str(e)}")
-        if 'cursor' in locals():
-            cursor.close()
+        logger.error(f"Error extracting bronze journal lines: {str(e)}")
         raise
 
 def is_tax_relevant(account_number: int) -> bool:
@@ -135,349 +208,310 @@ def is_tax_relevant(account_number: int) -> bool:
     Returns:
         True if account is tax relevant, False otherwise
     """
-    # VAT accounts
-    if account_number // 10000 in [4720, 4770]:
-        return True
-    
-    # Income tax accounts
-    if account_number // 10000 in [4740, 4745, 4752]:
-        return True
-    
-    # All Income accounts (for VAT declarations)
-    if account_number // 10000000 == 7:
-        return True
-    
-    # All Expense accounts (for VAT declarations)
-    if account_number // 10000000 == 6:
-        return True
-    
-    return False
+    # VAT (4720, 4770) and income tax (4740, 4745, 4752) accounts, and all
+    # expense (6) and income (7) accounts for VAT declarations
+    return (account_number // 10000 in TAX_SUBACCOUNTS
+            or account_number // 10000000 in TAX_GROUPS)
+
+def _log_skipped(reason: str, lines: pd.DataFrame) -> None:
+    """
+    Log a single warning for the journal lines skipped for one reason,
+    with the (entrynumber, line) of the first few.
+    """
+    if len(lines):
+        examples = list(lines[['entrynumber', 'line']].head(10).itertuples(index=False, name=None))
+        logger.warning("Skipping %d journal lines: %s (first entry/line: %s)", len(lines), reason, examples)
 
-def extract_tags_as_list(tags) -> List[str]:
+def transform_journal_lines(df: pd.DataFrame, batch_id: Optional[str] = None) -> Sequence[Tuple]:
     """
-    Extract tags from JSON or string format to a list of strings.
+    Transform and enrich journal lines data for silver layer.
+    
+    Account IDs, tax relevance and tags come from the extract query; filtering
+    and reconciliation status are computed column-wise.
     
     Args:
-        tags: Tags in JSON or string format
+        df: DataFrame with bronze journal lines data
+        batch_id: Batch identifier (defaults to the current date and time)
         
     Returns:
-        List of tag strings
+        Sequence of tuples with transformed data ready for insertion
     """
-    # Default empty list
-    tags_list = []
-    
-    # Process tags if they exist
-    if tags and tags != "null":
-        try:
-            # Parse tags from JSON if it's a string
-            if isinstance(tags, str):
-                # Try to handle various string formats
-                if tags.strip() == "":
-                    tags_list = []
-                elif tags.strip().lower() == "null":
-                    tags_list = []
-                else:
-                    try:
-                        parsed_tags = json.loads(tags)
-                        if isinstance(parsed_tags, list):
-                            tags_list = [str(tag).strip() for tag in parsed_tags if tag]
-                    except json.JSONDecodeError:
-                        # If it fails, maybe it's already a stringified list
-                        logger.warning(f"Failed to parse tags as JSON: {tags}")
-                        # If it looks like a list but isn't valid JSON
-                        if tags.startswith('[') and tags.endswith(']'):
-                            # Basic extraction with string operations
-                            items = tags[1:-1].split(',')
-                            tags_list = [item.strip(' "\'') for item in items if item.strip()]
-            elif isinstance(tags, list):
-                tags_list = [str(tag).strip() for tag in tags if tag]
-        except Exception as e:
-            logger.warning(f"Error processing tags: {e}")
-    
-    return tags_list
+    logger.info("Transforming journal lines data for silver.journal_lines")
+    
+    batch_id = batch_id or datetime.now().strftime("%Y%m%d%H%M%S")
+    total_lines = len(df)
+    
+    # Get account_id from account number
+    missing_account = df['account'].isna()
+    _log_skipped("missing account number", df[missing_account])
+    df = df[~missing_account]
+    
+    # account_id comes from the join with silver.accounts in the extract
+    unknown_account = df['account_id'].isna() | (df['account_id'] == '')
+    _log_skipped("account not found in silver.accounts", df[unknown_account])
+    df = df[~unknown_account]
+    
+    # Determine reconciliation status
+    is_reconciled = (df['checked'] == 'Yes').tolist()
+    is_checked = is_reconciled  # For now, use same value
+    
+    n = len(df)
+    transformed_data = ColumnRows(
+        df['entry_id'].tolist(),                    # entry_id
+        df['line'].tolist(),                        # line_number
+        df['account_id'].tolist(),                  # account_id
+        df['account'].astype('int64').tolist(),     # account_number
+        df['debit'].fillna(0).tolist(),             # debit_amount
+        df['credit'].fillna(0).tolist(),            # credit_amount
+        df['description'].tolist(),                 # description
+        df['tags'].tolist(),                        # tags (bronze JSON text, cast to jsonb)
+        df['tag1'].tolist(),                        # tag1
+        df['tag2'].tolist(),                        # tag2
+        df['tag3'].tolist(),                        # tag3
+        df['tag4'].tolist(),                        # tag4
+        is_checked,                                 # is_checked
+        is_reconciled,                              # is_reconciled
+        df['is_tax_relevant'].astype(bool).tolist(),  # is_tax_relevant
+        df['cost_center'].tolist(),                 # cost_center
+        df['business_line'].tolist(),               # business_line
+        ['bronze.holded_dailyledger'] * n,          # dwh_source_table
+        [batch_id] * n                              # dwh_batch_id
+    )
+    
+    logger.info(f"Transformation completed. {n} journal lines processed, {total_lines - n} skipped")
+    return transformed_data
 
-def extract_business_metadata_from_tags(tags) -> Tuple[Optional[str], Optional[str]]:
+def log_load_stats(cursor) -> None:
     """
-    Extract business metadata from the tags.
+    Log row count, totals by account type and tag usage of silver.journal_lines.
     
     Args:
-        tags: Tags in any format
-        
-    Returns:
-        Tuple of (cost_center, business_line)
+        cursor: Database cursor
     """
-    # Default values
-    cost_center = None
-    business_line = None
+    # Get total count of lines
+    cursor.execute("SELECT COUNT(*) FROM silver.journal_lines")
+    logger.info(f"silver.journal_lines now holds {cursor.fetchone()[0]} records")
     
-    # Get tags as list
-    tags_list = extract_tags_as_list(tags)
+    # Generate statistics by account type
+    cursor.execute("""
+        SELECT 
+            a.account_type,
+            COUNT(*) as line_count,
+            SUM(jl.debit_amount) as total_debit,
+            SUM(jl.credit_amount) as total_credit
+        FROM silver.journal_lines jl
+        JOIN silver.accounts a ON jl.account_id = a.account_id
+        GROUP BY a.account_type
+        ORDER BY a.account_type
+    """)
     
-    # Process tag list to extract business metadata
-    for tag in tags_list:
-        if tag.startswith("CC:"):
-            cost_center = tag[3:]
-        elif tag.startswith("BL:"):
-            business_line = tag[3:]
+    type_stats = cursor.fetchall()
+    logger.info("Journal lines by account type:")
+    for account_type, line_count, total_debit, total_credit in type_stats:
+        logger.info("  %s: %d lines, %.2f debit, %.2f credit", account_type, line_count, total_debit, total_credit)
     
-    return cost_center, business_line
+    # Generate statistics on tag usage
+    cursor.execute("""
+        SELECT 
+            COUNT(*) FILTER (WHERE tag1 IS NOT NULL) as tag1_count,
+            COUNT(*) FILTER (WHERE tag2 IS NOT NULL) as tag2_count,
+            COUNT(*) FILTER (WHERE tag3 IS NOT NULL) as tag3_count,
+            COUNT(*) FILTER (WHERE tag4 IS NOT NULL) as tag4_count
+        FROM silver.journal_lines
+    """)
+    
+    tag_stats = cursor.fetchone()
+    logger.info("Tag usage statistics:")
+    logger.info(f"  Tag1: {tag_stats[0]} lines")
+    logger.info(f"  Tag2: {tag_stats[1]} lines")
+    logger.info(f"  Tag3: {tag_stats[2]} lines")
+    logger.info(f"  Tag4: {tag_stats[3]} lines")
 
-def transform_journal_lines(df: pd.DataFrame, account_map: Dict[int, str]) -> List[Tuple]:
+def load_journal_lines(conn, lines_data: Sequence[Tuple], full_refresh: bool = False,
+                       batch_size: int = 10000, collect_stats: bool = False) -> int:
     """
-    Transform and enrich journal lines data for silver layer.
+    Load transformed journal lines into silver.journal_lines table.
     
     Args:
-        df: DataFrame with bronze journal lines data
-        account_map: Mapping of account numbers to account IDs
+        conn: Database connection
+        lines_data: Sequence of tuples with transformed data
+        full_refresh: If True, truncate target table before loading
+        batch_size: Lines sent to the database per COPY or multi-row INSERT statement
+        collect_stats: If True, log table statistics after the load (always on with verbose stats)
         
     Returns:
-        List of tuples with transformed data ready for insertion
+        Number of records inserted
     """
-    logger.info("Transforming journal lines data for silver.journal_lines")
+    return load_journal_line_chunks(conn, [lines_data], full_refresh, batch_size, collect_stats)
+
+def load_journal_line_chunks(conn, chunks: Iterable[Sequence[Tuple]], full_refresh: bool = False,
+                             batch_size: int = 10000, collect_stats: bool = False) -> int:
+    """
+    Load chunks of transformed journal lines into silver.journal_lines table.
     
-    batch_id = datetime.now().strftime("%Y%m%d%H%M%S")
-    transformed_data = []
-    skipped_lines = 0
-    
-    # Track processed keys to avoid duplicates
-    processed_keys = set()
-    
-    for _, row in df.iterrows():
-        # Check for duplicate unique key
-        key = (row['entry_id'], row['line'], row['timestamp'])
-        if key in processed_keys:
-            logger.warning(f"Skipping duplicate key during transform: entry_id={row['entry_id']}, line={row['line']}, timestamp={row['timestamp']}")
-            skipped_lines += 1
-            continue
-        
-        # Add to processed keys
-        processed_keys.add(key)
-        
-        # Get account_id from account number
-        account_number = row['account']
+    The TRUNCATE of a full refresh and all the inserts run in one
+    transaction, so a failed load leaves the previous contents in place. The
+    table is only truncated once the first non-empty chunk arrives, so an
+    empty extract leaves it untouched.
+    
+    Args:
+        conn: Database connection
+        chunks: Iterable of sequences of tuples with transformed data
+        full_refresh: If True, truncate target table before loading
+        batch_size: Lines sent to the database per COPY or multi-row INSERT statement
+        collect_stats: If True, log table statistics after the load (always on with verbose stats)
         
-        if account_number is None:
-            logger.warning(f"Missing account number for entry {row['entrynumber']} line {row['line']}, skipping")
-            skipped_lines += 1
-            continue
-            
-        account_id = account_map.get(account_number)
+    Returns:
+        Number of records inserted
+    """
+    try:
+        cursor = conn.cursor()
         
-        if not account_id:
-            logger.warning(f"Account {account_number} not found in silver.accounts for entry {row['entrynumber']} line {row['line']}, skipping")
-            skipped_lines += 1
-            continue
+        # Make sure we have a clean slate for the transaction
+        conn.rollback()
         
-        # Determine if account is tax relevant
-        tax_relevant = is_tax_relevant(account_number)
+        total_inserted = 0
+        truncated = False
         
-        # Determine reconciliation status
-        is_reconciled = row['checked'] == 'Yes' if row['checked'] else False
-        is_checked = is_reconciled  # For now, use same value
+        for lines_data in chunks:
+            if not lines_data:
+                continue
+            
+            # If full refresh, truncate target table in the same transaction
+            if full_refresh and not truncated:
+                logger.info("Truncating silver.journal_lines table for full refresh")
+                cursor.execute("TRUNCATE TABLE silver.journal_lines")
+                truncated = True
+            
+            # Large full refreshes are streamed with COPY, everything else upserted
+            use_copy = full_refresh and len(lines_data) > COPY_ROW_THRESHOLD
+            
+            for i in range(0, len(lines_data), batch_size):
+                # Lines are unique per (entry_id, line_number) from the extract query
+                batch = lines_data[i:i+batch_size]
+                if use_copy:
+                    # Nothing to conflict with after the TRUNCATE: stream the rows with COPY
+                    copy_rows_to_table(cursor, 'silver.journal_lines', JOURNAL_LINE_COLUMNS, batch)
+                else:
+                    # One multi-row upsert per batch: execute_values builds the statement
+                    # client-side, so there is no bind parameter limit to page around
+                    # (after a TRUNCATE there are simply no conflicts)
+                    execute_values(cursor, UPSERT_JOURNAL_LINES_SQL, batch,
+                                   template=JOURNAL_LINE_TEMPLATE, page_size=batch_size)
+                
+                total_inserted += len(batch)
+                logger.info(f"Inserted batch of {len(batch)} lines, total progress: {total_inserted}")
         
-        # Extract individual tags
-        tags_list = extract_tags_as_list(row['tags'])
+        # Commit the whole load at once
+        conn.commit()
         
-        # Get individual tags (up to 4)
-        tag1 = tags_list[0] if len(tags_list) > 0 else None
-        tag2 = tags_list[1] if len(tags_list) > 1 else None
-        tag3 = tags_list[2] if len(tags_list) > 2 else None
-        tag4 = tags_list[3] if len(tags_list) > 3 else None
+        if total_inserted == 0:
+            logger.warning("No data to load into silver.journal_lines")
+            cursor.close()
+            return 0
         
-        # Process tags to extract business metadata
-        cost_center, business_line = extract_business_metadata_from_tags(row['tags'])
+        logger.info(f"Successfully loaded {total_inserted} records into silver.journal_lines")
         
-        # Ensure tags is a valid JSON string for database storage
-        try:
-            tags_json = json.dumps(tags_list)
-        except Exception as e:
-            logger.warning(f"Error serializing tags to JSON: {e}")
-            tags_json = '[]'
+        if collect_stats or verbose_stats_enabled(logger):
+            log_load_stats(cursor)
         
-        # Create data tuple for insertion
-        line_data = (
-            row['entry_id'],           # entry_id
-            row['line'],               # line_number
-            account_id,                # account_id
-            account_number,            # account_number
-            row['debit'] or 0,         # debit_amount
-            row['credit'] or 0,        # credit_amount
-            row['description'],        # description
-            tags_json,                 # tags (as JSON string)
-            tag1,                      # tag1
-            tag2,                      # tag2
-            tag3,                      # tag3
-            tag4,                      # tag4
-            is_checked,                # is_checked
-            is_reconciled,             # is_reconciled
-            tax_relevant,              # is_tax_relevant
-            cost_center,               # cost_center
-            business_line,             # business_line
-            datetime.now(),            # dwh_created_at
-            datetime.now(),            # dwh_updated_at
-            'bronze.holded_dailyledger', # dwh_source_table
-            batch_id                   # dwh_batch_id
-        )
+        cursor.close()
+        return total_inserted
         
-        transformed_data.append(line_data)
-    
-    logger.info(f"Transformation completed. {len(transformed_data)} journal lines processed, {skipped_lines} skipped")
-    return transformed_data
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error loading data into silver.journal_lines: {str(e)}")
+        if 'cursor' in locals():
+            cursor.close()
+        raise
 
-def load_journal_lines(conn, lines_data: List[Tuple], full_refresh: bool = False) -> int:
+def load_journal_lines_in_database(conn, full_refresh: bool = False, collect_stats: bool = False) -> int:
     """
-    Load transformed journal lines into silver.journal_lines table.
+    Load silver.journal_lines straight from bronze.holded_dailyledger with a
+    single INSERT ... SELECT, without moving the lines through Python.
+    
+    Applies the same rules as transform_journal_lines on top of the extract
+    query: lines without an account or with an account missing from
+    silver.accounts are skipped.
     
     Args:
         conn: Database connection
-        lines_data: List of tuples with transformed data
         full_refresh: If True, truncate target table before loading
+        collect_stats: If True, log table statistics after the load (always on with verbose stats)
         
     Returns:
         Number of records inserted
     """
-    if not lines_data:
-        logger.warning("No data to load into silver.journal_lines")
-        return 0
+    batch_id = datetime.now().strftime("%Y%m%d%H%M%S")
+    
+    # The extract query's LIKE patterns must be escaped for parameter binding
+    insert_query = f"""
+    INSERT INTO silver.journal_lines ({', '.join(JOURNAL_LINE_COLUMNS)})
+    SELECT 
+        src.entry_id,
+        src.line,
+        src.account_id,
+        src.account,
+        COALESCE(src.debit, 0),
+        COALESCE(src.credit, 0),
+        src.description,
+        src.tags::jsonb,
+        src.tag1,
+        src.tag2,
+        src.tag3,
+        src.tag4,
+        COALESCE(src.checked = 'Yes', FALSE),  -- is_checked (for now, same as is_reconciled)
+        COALESCE(src.checked = 'Yes', FALSE),
+        src.is_tax_relevant,
+        src.cost_center,
+        src.business_line,
+        'bronze.holded_dailyledger',
+        %s
+    FROM ({JOURNAL_LINES_QUERY.replace('%', '%%')}) src
+    WHERE src.account IS NOT NULL
+    AND src.account_id IS NOT NULL
+    AND src.account_id <> ''
+    {"" if full_refresh else JOURNAL_LINES_ON_CONFLICT_SQL}
+    """
     
     try:
         cursor = conn.cursor()
         
-        # Make sure we have a clean slate for the transaction
-        conn.rollback()
-        
-        # If full refresh, truncate target table in its own transaction
+        # If full refresh, truncate target table in the same transaction
         if full_refresh:
             logger.info("Truncating silver.journal_lines table for full refresh")
             cursor.execute("TRUNCATE TABLE silver.journal_lines")
-            conn.commit()
         
-        # Prepare insert query with proper JSONB casting for tags
-        if full_refresh:
-            insert_query = """
-            INSERT INTO silver.journal_lines (
-                entry_id, line_number, account_id, account_number,
-                debit_amount, credit_amount, description, tags,
-                tag1, tag2, tag3, tag4,
-                is_checked, is_reconciled, is_tax_relevant,
-                cost_center, business_line,
-                dwh_created_at, dwh_updated_at, dwh_source_table, dwh_batch_id
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-        else:
-            # For incremental loads, use upsert pattern
-            insert_query = """
-            INSERT INTO silver.journal_lines (
-                entry_id, line_number, account_id, account_number,
-                debit_amount, credit_amount, description, tags,
-                tag1, tag2, tag3, tag4,
-                is_checked, is_reconciled, is_tax_relevant,
-                cost_center, business_line,
-                dwh_created_at, dwh_updated_at, dwh_source_table, dwh_batch_id
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (entry_id, line_number) DO UPDATE SET
-                account_id = EXCLUDED.account_id,
-                account_number = EXCLUDED.account_number,
-                debit_amount = EXCLUDED.debit_amount,
-                credit_amount = EXCLUDED.credit_amount,
-                description = EXCLUDED.description,
-                tags = EXCLUDED.tags,
-                tag1 = EXCLUDED.tag1,
-                tag2 = EXCLUDED.tag2,
-                tag3 = EXCLUDED.tag3,
-                tag4 = EXCLUDED.tag4,
-                is_checked = EXCLUDED.is_checked,
-                is_reconciled = EXCLUDED.is_reconciled,
-                is_tax_relevant = EXCLUDED.is_tax_relevant,
-                cost_center = EXCLUDED.cost_center,
-                business_line = EXCLUDED.business_line,
-                dwh_updated_at = CURRENT_TIMESTAMP,
-                dwh_batch_id = EXCLUDED.dwh_batch_id
-            """
+        logger.info("Loading silver.journal_lines with INSERT ... SELECT from bronze.holded_dailyledger")
+        cursor.execute(insert_query, (batch_id,))
+        count = cursor.rowcount
+        conn.commit()
         
-        # Track processed keys again to ensure no duplicates during loading
-        processed_keys = set()
+        logger.info(f"Successfully loaded {count} records into silver.journal_lines")
         
-        # Execute batch insert
-        batch_size = 1000  # Process in batches to avoid memory issues
-        total_inserted = 0
-        
-        for i in range(0, len(lines_data), batch_size):
-            batch = []
-            for line in lines_data[i:i+batch_size]:
-                key = (line[0], line[1])  # entry_id, line_number
-                if key not in processed_keys:
-                    processed_keys.add(key)
-                    batch.append(line)
-                else:
-                    logger.warning(f"Skipping duplicate key during load: entry_id={line[0]}, line_number={line[1]}")
-            
-            # Process the batch
-            if batch:
-                for line in batch:
-                    cursor.execute(insert_query, line)
-                
-                conn.commit()
-                total_inserted += len(batch)
-                logger.info(f"Inserted batch of {len(batch)} lines, total progress: {total_inserted}/{len(lines_data)}")
-        
-        # Get total count of lines
-        cursor.execute("SELECT COUNT(*) FROM silver.journal_lines")
-        count = cursor.fetchone()[0]
-        
-        logger.info(f"Successfully loaded {count} total records in silver.journal_lines")
-        
-        # Generate statistics by account type
-        cursor.execute("""
-            SELECT 
-                a.account_type,
-                COUNT(*) as line_count,
-                SUM(jl.debit_amount) as total_debit,
-                SUM(jl.credit_amount) as total_credit
-            FROM silver.journal_lines jl
-            JOIN silver.accounts a ON jl.account_id = a.account_id
-            GROUP BY a.account_type
-            ORDER BY a.account_type
-        """)
-        
-        type_stats = cursor.fetchall()
-        logger.info("Journal lines by account type:")
-        for account_type, line_count, total_debit, total_credit in type_stats:
-            logger.info(f"  {account_type}: {line_count} lines, {total_debit:.2f} debit, {total_credit:.2f} credit")
-        
-        # Generate statistics on tag usage
-        cursor.execute("""
-            SELECT 
-                COUNT(*) FILTER (WHERE tag1 IS NOT NULL) as tag1_count,
-                COUNT(*) FILTER (WHERE tag2 IS NOT NULL) as tag2_count,
-                COUNT(*) FILTER (WHERE tag3 IS NOT NULL) as tag3_count,
-                COUNT(*) FILTER (WHERE tag4 IS NOT NULL) as tag4_count
-            FROM silver.journal_lines
-        """)
-        
-        tag_stats = cursor.fetchone()
-        logger.info("Tag usage statistics:")
-        logger.info(f"  Tag1: {tag_stats[0]} lines")
-        logger.info(f"  Tag2: {tag_stats[1]} lines")
-        logger.info(f"  Tag3: {tag_stats[2]} lines")
-        logger.info(f"  Tag4: {tag_stats[3]} lines")
+        if collect_stats or verbose_stats_enabled(logger):
+            log_load_stats(cursor)
         
         cursor.close()
         return count
         
     except Exception as e:
         conn.rollback()
-        logger.error(f"Error loading data into silver.journal_lines: {str(e)}")
+        logger.error(f"Error loading data into silver.journal_lines in database: {str(e)}")
         if 'cursor' in locals():
             cursor.close()
         raise
 
-def load_journal_lines_main(full_refresh: bool = True) -> bool:
+def load_journal_lines_main(full_refresh: bool = True, chunksize: Optional[int] = 50000,
+                            in_database: bool = False, collect_stats: bool = False) -> bool:
     """
     Main function to orchestrate the ETL process for journal lines.
     
     Args:
         full_refresh: If True, perform full refresh instead of incremental load
+        chunksize: Lines per chunk to extract, transform and load; None processes everything at once
+        in_database: If True, transform and load with an INSERT ... SELECT in the database
+        collect_stats: If True, log table statistics after the load
         
     Returns:
         True if load was successful, False otherwise
@@ -486,23 +520,29 @@ def load_journal_lines_main(full_refresh: bool = True) -> bool:
     logger.info(f"Starting journal lines ETL process at {start_time}")
     
     try:
-        # Get database connection
-        conn = get_db_connection()
-        
-        # Extract data from bronze layer with journal entry IDs
-        df_lines = extract_bronze_journal_lines(conn)
-        
-        # Get accounts mapping
-        account_map = get_accounts_mapping(conn)
-        
-        # Transform data
-        transformed_data = transform_journal_lines(df_lines, account_map)
-        
-        # Load data into silver layer
-        inserted_count = load_journal_lines(conn, transformed_data, full_refresh)
-        
-        # Close connection
-        conn.close()
+        # Borrow a connection from the pool, returned when the block exits
+        with db_connection() as conn:
+            if in_database:
+                # The whole ETL runs inside Postgres
+                inserted_count = load_journal_lines_in_database(conn, full_refresh, collect_stats)
+            elif chunksize:
+                # Stream, transform and load chunk by chunk under one batch_id,
+                # fetching and transforming the next chunk in the background while one is loaded
+                batch_id = datetime.now().strftime("%Y%m%d%H%M%S")
+                chunks = iter_in_background(
+                    transform_journal_lines(df_chunk, batch_id)
+                    for df_chunk in iter_bronze_journal_lines(conn, chunksize)
+                )
+                inserted_count = load_journal_line_chunks(conn, chunks, full_refresh, collect_stats=collect_stats)
+            else:
+                # Extract data from bronze layer with journal entry IDs
+                df_lines = extract_bronze_journal_lines(conn)
+                
+                # Transform data
+                transformed_data = transform_journal_lines(df_lines)
+                
+                # Load data into silver layer
+                inserted_count = load_journal_lines(conn, transformed_data, full_refresh, collect_stats=collect_stats)
         
         # Log completion
         end_time = datetime.now()
@@ -513,8 +553,6 @@ def load_journal_lines_main(full_refresh: bool = True) -> bool:
         
     except Exception as e:
         logger.error(f"Journal lines ETL failed: {str(e)}")
-        if 'conn' in locals() and not conn.closed:
-            conn.close()
         return False
 
 if __name__ == "__main__":
@@ -523,8 +561,12 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description='Load journal lines into silver layer')
     parser.add_argument('--full-refresh', action='store_true', help='Perform full refresh instead of incremental load')
+    parser.add_argument('--chunksize', type=int, default=50000, help='Lines per chunk (0 to process everything at once)')
+    parser.add_argument('--in-database', action='store_true', help='Transform and load with INSERT ... SELECT in the database')
+    parser.add_argument('--stats', action='store_true', help='Log table statistics after the load (full table scans)')
     
     args = parser.parse_args()
     
-    success = load_journal_lines_main(full_refresh=args.full_refresh)
+    success = load_journal_lines_main(full_refresh=args.full_refresh, chunksize=args.chunksize,
+                                      in_database=args.in_database, collect_stats=args.stats)
     exit(0 if success else 1)
\ No newline at end of file
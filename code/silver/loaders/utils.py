@@ -2,32 +2,294 @@
 Utility functions for silver layer data loaders.
 """
 
+import csv
+import io
 import os
+import queue
+import threading
+from contextlib import contextmanager
+import pandas as pd
 import psycopg2
+import psycopg2.pool
 from dotenv import load_dotenv
 import logging
+from typing import Iterable, Iterator, List, Optional, Sequence, TypeVar
 
 # Load environment variables from .env file
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Below this many rows a batched INSERT is as fast as COPY, so loaders only
+# switch to copy_rows_to_table for larger loads
+COPY_ROW_THRESHOLD = 1024
+
+class ColumnRows(Sequence):
+    """
+    Read-only sequence of row tuples backed by per-column lists.
+    
+    Rows are built one at a time as the sequence is iterated (for example by
+    execute_values or copy_rows_to_table), so a transformed batch is never
+    held both as columns and as a list of tuples.
+    """
+    
+    def __init__(self, *columns: Sequence):
+        self.columns = columns
+    
+    def __len__(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ColumnRows(*(column[index] for column in self.columns))
+        return tuple(column[index] for column in self.columns)
+    
+    def __iter__(self) -> Iterator[tuple]:
+        return zip(*self.columns)
+
+# Connection pool shared by every loader run in the same process
+_pool = None
+
+def get_pool() -> psycopg2.pool.ThreadedConnectionPool:
+    """
+    Get the process-wide connection pool, creating it on first use from
+    environment variables.
+    
+    Returns:
+        Thread-safe psycopg2 connection pool
+    """
+    global _pool
+    if _pool is None:
+        try:
+            _pool = psycopg2.pool.ThreadedConnectionPool(
+                minconn=1,
+                maxconn=8,
+                host=os.environ.get("SUPABASE_DB_HOST"),
+                database=os.environ.get("SUPABASE_DB_NAME", "postgres"),
+                user=os.environ.get("SUPABASE_DB_USER"),
+                password=os.environ.get("SUPABASE_DB_PASSWORD"),
+                port=os.environ.get("SUPABASE_DB_PORT", "5432")
+            )
+        except Exception as e:
+            logger.error(f"Error connecting to database: {str(e)}")
+            raise
+    return _pool
+
 def get_db_connection():
     """
-    Establish connection to the database using environment variables.
+    Get a database connection from the pool, so consecutive loaders reuse
+    the same session instead of reconnecting.
+    
+    Connections must be handed back with release_db_connection().
     
     Returns:
         Database connection object
     """
     try:
-        conn = psycopg2.connect(
-            host=os.environ.get("SUPABASE_DB_HOST"),
-            database=os.environ.get("SUPABASE_DB_NAME", "postgres"),
-            user=os.environ.get("SUPABASE_DB_USER"),
-            password=os.environ.get("SUPABASE_DB_PASSWORD"),
-            port=os.environ.get("SUPABASE_DB_PORT", "5432")
-        )
-        return conn
+        return get_pool().getconn()
     except Exception as e:
         logger.error(f"Error connecting to database: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+def release_db_connection(conn) -> None:
+    """
+    Return a connection obtained with get_db_connection() to the pool.
+    
+    Any open transaction is rolled back; closed connections are discarded.
+    
+    Args:
+        conn: Database connection
+    """
+    get_pool().putconn(conn)
+
+@contextmanager
+def db_connection() -> Iterator:
+    """
+    Borrow a connection from the pool for the duration of a with block,
+    returning it with release_db_connection() even if the block raises.
+    
+    Returns:
+        Context manager yielding a database connection
+    """
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        release_db_connection(conn)
+
+def verbose_stats_enabled(loader_logger: logging.Logger) -> bool:
+    """
+    Whether a loader should run its post-load reporting queries, which scan
+    the whole target table: only when ETL_VERBOSE_STATS is set or the
+    loader logs at DEBUG level.
+    
+    Args:
+        loader_logger: Logger of the calling loader
+        
+    Returns:
+        True if the reporting queries should run
+    """
+    return bool(os.environ.get("ETL_VERBOSE_STATS")) or loader_logger.isEnabledFor(logging.DEBUG)
+
+def copy_query_to_dataframe(conn, query: str, params: Optional[tuple] = None,
+                            **read_csv_kwargs) -> pd.DataFrame:
+    """
+    Run a query through COPY ... TO STDOUT and parse the CSV output with pandas.
+    
+    This avoids converting every cell to a Python object through the cursor,
+    which is considerably faster than pd.read_sql for large extracts.
+    
+    NULL is exported as \\N and only \\N is read back as missing, so empty
+    strings stay empty strings (as in copy_rows_to_table).
+    
+    Args:
+        conn: Database connection
+        query: SELECT statement to export (without trailing semicolon)
+        params: Query parameters, bound client-side since COPY does not accept them
+        **read_csv_kwargs: Extra arguments passed to pd.read_csv (dtype, parse_dates, chunksize, ...)
+        
+    Returns:
+        DataFrame with the query results
+    """
+    buffer = io.BytesIO()
+    cursor = conn.cursor()
+    try:
+        if params is not None:
+            query = cursor.mogrify(query, params).decode()
+        cursor.copy_expert(
+            f"COPY ({query.strip().rstrip(';')}) TO STDOUT WITH (FORMAT csv, HEADER, NULL '\\N')",
+            buffer
+        )
+    finally:
+        cursor.close()
+    
+    buffer.seek(0)
+    read_csv_kwargs.setdefault('keep_default_na', False)
+    read_csv_kwargs.setdefault('na_values', ['\\N'])
+    return pd.read_csv(buffer, **read_csv_kwargs)
+
+def copy_rows_to_table(cursor, table: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+    """
+    Bulk load rows into a table with COPY ... FROM STDIN in CSV format.
+    
+    None values are written as \\N so they are loaded as NULL, while empty
+    strings are kept as empty strings.
+    
+    Args:
+        cursor: Database cursor
+        table: Target table (schema-qualified)
+        columns: Target column names, in the same order as the row values
+        rows: Iterable of row tuples
+        
+    Returns:
+        Number of rows copied
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['\\N' if value is None else value for value in row])
+    
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+        buffer
+    )
+    return cursor.rowcount
+
+def drop_secondary_indexes(cursor, table: str) -> List[str]:
+    """
+    Drop the indexes of a table that do not back a constraint, so a bulk
+    load does not have to maintain them row by row.
+    
+    Primary key and unique constraint indexes are kept. Must run in the same
+    transaction as the load so a rollback restores the indexes.
+    
+    Args:
+        cursor: Database cursor
+        table: Schema-qualified table name
+        
+    Returns:
+        Definitions of the dropped indexes, for recreate_indexes()
+    """
+    cursor.execute("""
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = %s::regclass
+        AND NOT EXISTS (
+            SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid
+        )
+    """, (table,))
+    indexes = cursor.fetchall()
+    
+    for index_name, _ in indexes:
+        cursor.execute(f"DROP INDEX {index_name}")
+    
+    logger.info(f"Dropped {len(indexes)} secondary indexes on {table}")
+    return [index_def for _, index_def in indexes]
+
+def recreate_indexes(cursor, index_defs: Sequence[str]) -> None:
+    """
+    Recreate indexes dropped by drop_secondary_indexes().
+    
+    Args:
+        cursor: Database cursor
+        index_defs: CREATE INDEX statements
+    """
+    for index_def in index_defs:
+        cursor.execute(index_def)
+    
+    logger.info(f"Recreated {len(index_defs)} indexes")
+
+def iter_in_background(iterable: Iterable[T], maxsize: int = 2) -> Iterator[T]:
+    """
+    Consume an iterable in a background thread and yield its items through a
+    bounded queue, so producing the next item overlaps with processing the
+    current one (e.g. extract/transform a chunk while the previous one loads).
+    
+    Exceptions raised by the producer are re-raised in the consumer. If the
+    consumer stops early, the producer is stopped after its current item.
+    
+    Args:
+        iterable: Source of items (consumed only from the background thread)
+        maxsize: Maximum number of items buffered ahead of the consumer
+        
+    Returns:
+        Iterator over the items of iterable, in order
+    """
+    items = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    
+    def put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        try:
+            for item in iterable:
+                if not put((False, item)):
+                    return
+        except Exception as e:
+            put((True, e))
+        else:
+            put((True, None))
+    
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            done, value = items.get()
+            if done:
+                if value is not None:
+                    raise value
+                return
+            yield value
+    finally:
+        stop.set()
+        thread.join()
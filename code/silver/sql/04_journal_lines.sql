@@ -18,8 +18,8 @@ CREATE TABLE silver.journal_lines (
   line_number integer NOT NULL,
   account_id character varying(24) NOT NULL,
   account_number bigint NOT NULL,
-  debit_amount numeric(15, 2) NULL DEFAULT 0,
-  credit_amount numeric(15, 2) NULL DEFAULT 0,
+  debit_amount numeric(15, 2) NOT NULL DEFAULT 0,
+  credit_amount numeric(15, 2) NOT NULL DEFAULT 0,
   description text NULL,
   tags jsonb NULL,
   tag1 character varying(100) NULL,
@@ -52,4 +52,21 @@ COMMENT ON TABLE silver.account_balances IS 'Account balances by fiscal period w
 -- Add column comments
 COMMENT ON COLUMN silver.account_balances.balance_id IS 'Surrogate key for the account balance record';
 COMMENT ON COLUMN silver.account_balances.start_balance IS 'Opening balance at the start of the period';
--- Additional column comments...
\ No newline at end of file
+-- Additional column comments...
+
+-- Drop summary table if it exists
+DROP TABLE IF EXISTS silver.account_balances_by_type_summary;
+
+-- Create the account balances summary by account type
+CREATE TABLE silver.account_balances_by_type_summary (
+  account_type character varying(100) NOT NULL,
+  account_count integer NOT NULL DEFAULT 0,
+  balance_records integer NOT NULL DEFAULT 0,
+  total_balance numeric(18, 2) NULL DEFAULT 0,
+  dwh_updated_at timestamp without time zone NULL DEFAULT CURRENT_TIMESTAMP,
+  dwh_batch_id character varying(50) NULL,
+  CONSTRAINT account_balances_by_type_summary_pkey PRIMARY KEY (account_type)
+) TABLESPACE pg_default;
+
+-- Add table comment
+COMMENT ON TABLE silver.account_balances_by_type_summary IS 'Account balances aggregated by account type, refreshed by the account balances loader for the types touched in each batch';